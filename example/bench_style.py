@@ -0,0 +1,75 @@
+"""time to window of a large form for every style of quick
+
+    python bench_style.py [n_options] [repeat]
+
+Every run is a new process, as a user launching the tool would start it.
+"""
+import sys
+import time
+import statistics
+import subprocess
+
+_START = time.perf_counter()
+
+
+def child(style, n):
+    import click
+    from qtpy import QtCore
+    import quick
+
+    params = []
+    for i in range(n):
+        kind = i % 4
+        if kind == 0:
+            params.append(click.Option([f"--text{i}"], default="text"))
+        elif kind == 1:
+            params.append(click.Option([f"--int{i}"], type=int, default=i))
+        elif kind == 2:
+            params.append(click.Option([f"--flag{i}"], is_flag=True))
+        else:
+            params.append(click.Option([f"--choice{i}"], type=click.Choice("abc")))
+    cmd = click.Command("bench", params=params, callback=lambda **kw: None)
+    app = quick._style_app(style)
+    ex = quick.App(cmd, run_exit=False, new_thread=False, output="term")
+
+    def shown():
+        print(time.perf_counter() - _START)
+        ex.close()
+        app.quit()
+
+    QtCore.QTimer.singleShot(0, shown)
+    app.exec()
+
+
+def run(style, n, repeat):
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", style, str(n)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        times.append(float(out.split()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{n} options, median of {repeat} runs")
+    cases = [
+        ("base stylesheet", ""),
+        ("qdarkstyle", "qdarkstyle"),
+        ("dark palette", "dark"),
+        ("light palette", "light"),
+    ]
+    for label, style in cases:
+        print(f"{label:>15}: {run(style, n, repeat):.3f} s")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -2,6 +2,27 @@ from typing import Optional
 import signal
 import logging
 import sys
+import time
+from bisect import bisect_left, bisect_right
+import heapq
+import re
+import inspect
+import runpy
+import itertools
+import traceback
+import contextvars
+import collections
+import collections.abc
+import dataclasses
+import json
+import csv
+import asyncio
+import threading
+import queue
+import os
+import glob
+import gzip
+import zlib
 from functools import partial
 import math
 from copy import copy
@@ -22,6 +43,8 @@ except ModuleNotFoundError:
 
 _GTypeRole = QtCore.Qt.ItemDataRole.UserRole
 _missing = object()
+# click >= 8.3 marks parameters without a default by a (truthy) sentinel
+_UNSET = getattr(click.core, "UNSET", _missing)
 signal.signal(
     signal.SIGINT, signal.SIG_DFL
 )  # make CTRL+C exit the program successfully
@@ -63,8 +86,70 @@ class GStyle(object):
             }
         """
 
+    # stand-ins for the font rules of `_base_style` in the palette themes
+    _base_fonts = {
+        "_OptionLabel": (16, True, "monospace"),
+        "_HelpLabel": (14, False, "serif"),
+        "_InputComboBox": (16, False, None),
+        "_InputLineEdit": (16, False, None),
+        "_InputCheckBox": (16, False, None),
+        "_InputSpinBox": (16, False, None),
+        "_InputTabWidget": (16, True, None),
+        "GListView": (16, False, None),
+    }
+
+    # QPalette roles of the palette themes
+    _palettes = {
+        "dark": {
+            "Window": "#19232d",
+            "WindowText": "#eff0f1",
+            "Base": "#1e2a35",
+            "AlternateBase": "#26323d",
+            "Text": "#eff0f1",
+            "Button": "#455364",
+            "ButtonText": "#eff0f1",
+            "Highlight": "#346792",
+            "HighlightedText": "#eff0f1",
+            "ToolTipBase": "#19232d",
+            "ToolTipText": "#eff0f1",
+            "Link": "#259ae9",
+        },
+        "light": {
+            "Window": "#fafafa",
+            "WindowText": "#19232d",
+            "Base": "#ffffff",
+            "AlternateBase": "#f0f0f0",
+            "Text": "#19232d",
+            "Button": "#e0e1e3",
+            "ButtonText": "#19232d",
+            "Highlight": "#9fcbff",
+            "HighlightedText": "#19232d",
+            "ToolTipBase": "#ffffdc",
+            "ToolTipText": "#19232d",
+            "Link": "#0056b3",
+        },
+    }
+
     def __init__(self, style=""):
-        if not GStyle.check_style(style):
+        """
+        Parameters
+        ----------
+        style : str
+            'qdarkstyle': qdarkstyle's stylesheet
+            'dark', 'light': a palette on the Fusion style, without any
+            global stylesheet, so widgets are not re-styled one by one
+            anything else: the plain `_base_style`
+        """
+        self.palette = None
+        self.fonts = {}
+        if style in GStyle._palettes:
+            colors = GStyle._palettes[style]
+            self.text_color = colors["Text"]
+            self.placehoder_color = "#898b8d"
+            self.stylesheet = ""
+            self.palette = colors
+            self.fonts = GStyle._base_fonts
+        elif not GStyle.check_style(style):
             self.text_color = "black"
             self.placehoder_color = "#898b8d"
             self.stylesheet = (
@@ -78,10 +163,7 @@ class GStyle(object):
         elif style == "qdarkstyle":
             self.text_color = "#eff0f1"
             self.placehoder_color = "#898b8d"
-            self.stylesheet = (
-                qdarkstyle.load_stylesheet_pyqt5()
-                + GStyle._base_style
-                + """
+            extra = """
                     .GListView{
                         padding: 5px;
                         }
@@ -89,13 +171,50 @@ class GStyle(object):
                         border: 5px solid gray;
                         }
                     """
+            self.stylesheet = (
+                qdarkstyle.load_stylesheet_pyqt5() + GStyle._base_style + extra
             )
 
     @staticmethod
     def check_style(style):
         if style == "qdarkstyle":
             return _has_qdarkstyle
-        return False
+        return style in GStyle._palettes
+
+    def apply(self, app):
+        """style `app`, a QApplication"""
+        if self.palette is not None:
+            base = app.font()
+            fonts = {}
+            for class_name, (size, bold, family) in self.fonts.items():
+                font = fonts[class_name] = QtGui.QFont(base)
+                font.setPixelSize(size)
+                font.setBold(bold)
+                if family:
+                    font.setFamily(family)
+            app.setStyle(_ThemeStyle(fonts))
+            palette = QtGui.QPalette()
+            for role, color in self.palette.items():
+                palette.setColor(
+                    getattr(QtGui.QPalette.ColorRole, role), QtGui.QColor(color)
+                )
+            app.setPalette(palette)
+        app.setStyleSheet(self.stylesheet)
+
+
+class _ThemeStyle(QtWidgets.QProxyStyle):
+    """Fusion, giving quick's own widgets their `fonts` by class name"""
+
+    def __init__(self, fonts):
+        super(_ThemeStyle, self).__init__("Fusion")
+        self.fonts = fonts
+
+    def polish(self, arg):
+        if isinstance(arg, QtWidgets.QWidget):
+            font = self.fonts.get(type(arg).__name__)
+            if font is not None:
+                arg.setFont(font)
+        return super(_ThemeStyle, self).polish(arg)
 
 
 _gstyle = GStyle()
@@ -199,10 +318,8 @@ class GEditDelegate(QtWidgets.QStyledItemDelegate):
         led.setPlaceholderText(tp.name)
 
         validator = select_type_validator(tp)
-
-        assert validator is not None
-
-        led.setValidator(validator)
+        if validator is not None:
+            led.setValidator(validator)
         return led
 
     def setEditorData(self, editor, index):
@@ -235,6 +352,122 @@ def generate_label(opt):
     return param
 
 
+_COMPLETION_TTL = 30.0
+_COMPLETION_CACHE_SIZE = 1024
+_completion_cache = {}
+
+
+def has_custom_completion(opt):
+    """whether `opt` supplies its own `shell_complete`/`autocompletion`"""
+    return (
+        getattr(opt, "_custom_shell_complete", None) is not None
+        or getattr(opt, "autocompletion", None) is not None
+    )
+
+
+def param_completions(opt, incomplete):
+    """ask click for the completions of `opt` starting with `incomplete`"""
+    ctx = click.Context(click.Command(opt.name), resilient_parsing=True)
+    if hasattr(opt, "shell_complete"):
+        items = opt.shell_complete(ctx, incomplete)
+    else:  # click < 8
+        items = opt.autocompletion(ctx, [], incomplete)
+    ans = []
+    for item in items:
+        if isinstance(item, tuple):
+            item = item[0]
+        ans.append(str(getattr(item, "value", item)))
+    return ans
+
+
+def cached_completions(opt, incomplete):
+    hit = _completion_cache.get((opt, incomplete))
+    if hit is not None and time.monotonic() - hit[0] < _COMPLETION_TTL:
+        return hit[1]
+    return None
+
+
+def cache_completions(opt, incomplete, items):
+    if len(_completion_cache) >= _COMPLETION_CACHE_SIZE:
+        _completion_cache.pop(next(iter(_completion_cache)))
+    _completion_cache[(opt, incomplete)] = (time.monotonic(), items)
+
+
+class _CompletionSignals(QtCore.QObject):
+    done = QtCore.Signal(int, str, object)
+
+
+class _CompletionRunnable(QtCore.QRunnable):
+    def __init__(self, opt, seq, incomplete, completer):
+        super(_CompletionRunnable, self).__init__()
+        self.opt = opt
+        self.seq = seq
+        self.incomplete = incomplete
+        self.completer = completer
+        self.signals = completer.signals
+
+    @QtCore.Slot()
+    def run(self):
+        if self.seq != self.completer.seq:
+            # a newer request is already queued
+            return
+        try:
+            items = param_completions(self.opt, self.incomplete)
+        except Exception as e:
+            logging.error(e)
+            items = []
+        self.signals.done.emit(self.seq, self.incomplete, items)
+
+
+class GParamCompleter(QtWidgets.QCompleter):
+    """completer fed by the click completion hook of `opt`
+
+    The hook runs on the global thread pool once typing pauses for `delay`
+    ms; results of stale requests are dropped.
+    """
+
+    delay = 200
+
+    def __init__(self, opt, line_edit):
+        super(GParamCompleter, self).__init__(line_edit)
+        self.opt = opt
+        self.seq = 0
+        self._model = QtCore.QStringListModel(self)
+        self.setModel(self._model)
+        self.setCaseSensitivity(QtCore.Qt.CaseSensitivity.CaseInsensitive)
+        self.signals = _CompletionSignals(self)
+        self.signals.done.connect(self.show_completions)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.delay)
+        self._timer.timeout.connect(self.request)
+        line_edit.textEdited.connect(self._timer.start)
+        line_edit.setCompleter(self)
+
+    @QtCore.Slot()
+    def request(self):
+        incomplete = self.widget().text()
+        self.seq += 1
+        items = cached_completions(self.opt, incomplete)
+        if items is not None:
+            self._update(incomplete, items)
+            return
+        QtCore.QThreadPool.globalInstance().start(
+            _CompletionRunnable(self.opt, self.seq, incomplete, self)
+        )
+
+    def show_completions(self, seq, incomplete, items):
+        cache_completions(self.opt, incomplete, items)
+        if seq == self.seq:
+            self._update(incomplete, items)
+
+    def _update(self, incomplete, items):
+        self._model.setStringList(items)
+        self.setCompletionPrefix(incomplete)
+        if items and self.widget().hasFocus():
+            self.complete()
+
+
 class GStringLineEditor(click.types.StringParamType):
     def to_widget(self, opt, validator=None):
         value = _InputLineEdit()
@@ -244,6 +477,8 @@ class GStringLineEditor(click.types.StringParamType):
         if getattr(opt, "hide_input", False):
             value.setEchoMode(QtWidgets.QLineEdit.EchoMode.Password)
         value.setValidator(validator)
+        if has_custom_completion(opt):
+            GParamCompleter(opt, value)
 
         def to_command():
             return [opt.opts[0], value.text()]
@@ -286,6 +521,75 @@ class GFileDialog(QtWidgets.QFileDialog):
     def accept_all(self):
         super(GFileDialog, self).done(QtWidgets.QFileDialog.DialogCode.Accepted)
 
+    @staticmethod
+    def shared(exists=False, file_okay=True, dir_okay=True):
+        """return the cached dialog for this path mode
+
+        The dialog keeps its directory model alive between runs, so a second
+        open does not rescan the directory from scratch. That model is the
+        dialog's own, not `shared_fs_model`: `QFileDialog` cannot be given a
+        source model, only a proxy over its own.
+        """
+        key = (exists, file_okay, dir_okay)
+        dlg = _file_dialogs.get(key)
+        if dlg is None:
+            dlg = GFileDialog(
+                None,
+                "Select File Dialog",
+                "./",
+                "*",
+                exists=exists,
+                file_okay=file_okay,
+                dir_okay=dir_okay,
+            )
+            dlg.setWindowModality(QtCore.Qt.WindowModality.ApplicationModal)
+            _file_dialogs[key] = dlg
+        return dlg
+
+
+_file_dialogs = {}
+_fs_model = None
+
+
+def shared_fs_model():
+    """the filesystem model shared by all path completers
+
+    `QFileSystemModel` lists directories on its own gatherer thread, caches
+    the result and watches the listed directories for changes.
+    """
+    global _fs_model
+    if _fs_model is None:
+        _fs_model = QtWidgets.QFileSystemModel()
+        _fs_model.setFilter(
+            QtCore.QDir.Filter.AllEntries
+            | QtCore.QDir.Filter.NoDotAndDotDot
+            | QtCore.QDir.Filter.AllDirs
+        )
+        _fs_model.setRootPath("")
+    return _fs_model
+
+
+class _PathCompleter(QtWidgets.QCompleter):
+    """complete paths relative to the working directory as well
+
+    The shared model is rooted at the filesystem root, so a relative input
+    is looked up under the working directory and completed back relative.
+    """
+
+    def splitPath(self, path):
+        self._base = None
+        if not os.path.isabs(os.path.expanduser(path)):
+            self._base = os.getcwd()
+            path = os.path.join(self._base, path)
+        return super(_PathCompleter, self).splitPath(path)
+
+    def pathFromIndex(self, index):
+        path = super(_PathCompleter, self).pathFromIndex(index)
+        base = getattr(self, "_base", None)
+        if base is not None and path.startswith(base.rstrip(os.sep) + os.sep):
+            return os.path.relpath(path, base)
+        return path
+
 
 class GLineEdit_path(QtWidgets.QLineEdit):
     def __init__(self, parent=None, exists=False, file_okay=True, dir_okay=True):
@@ -294,19 +598,22 @@ class GLineEdit_path(QtWidgets.QLineEdit):
             self.style().standardIcon(QtWidgets.QStyle.StandardPixmap.SP_DirIcon),
             QtWidgets.QLineEdit.ActionPosition.TrailingPosition,
         )
-        self.fdlg = lambda: GFileDialog(
-            self,
-            "Select File Dialog",
-            "./",
-            "*",
-            exists=exists,
-            file_okay=file_okay,
-            dir_okay=dir_okay,
+        self.fdlg = partial(
+            GFileDialog.shared, exists=exists, file_okay=file_okay, dir_okay=dir_okay
         )
         self.action.triggered.connect(self.run_dialog)
+        completer = _PathCompleter(shared_fs_model(), self)
+        completer.setCompletionMode(QtWidgets.QCompleter.CompletionMode.PopupCompletion)
+        self.setCompleter(completer)
 
     def run_dialog(self):
         dlg = self.fdlg()
+        text = self.text()
+        if text:
+            info = QtCore.QFileInfo(text)
+            dlg.setDirectory(
+                info.absoluteFilePath() if info.isDir() else info.absolutePath()
+            )
         if dlg.exec() == QtWidgets.QFileDialog.DialogCode.Accepted:
             self.setText(dlg.selectedFiles()[0])
 
@@ -460,10 +767,144 @@ def bool_flag_option(opt):
     return [checkbox], to_command
 
 
+_CHOICE_FILTER_THRESHOLD = 100
+
+
+class _LazyListModel(QtCore.QAbstractListModel):
+    """read-only list of strings handed to views in `batch` sized chunks"""
+
+    batch = 1000
+
+    def __init__(self, items=(), parent=None):
+        super(_LazyListModel, self).__init__(parent)
+        self.items = list(items)
+        self._loaded = min(len(self.items), self.batch)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if index.isValid() and role in (
+            QtCore.Qt.ItemDataRole.DisplayRole,
+            QtCore.Qt.ItemDataRole.EditRole,
+        ):
+            return self.items[index.row()]
+        return None
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._loaded < len(self.items)
+
+    def fetchMore(self, parent):
+        n = min(self.batch, len(self.items) - self._loaded)
+        if parent.isValid() or n <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._loaded, self._loaded + n - 1)
+        self._loaded += n
+        self.endInsertRows()
+
+    def load(self, n):
+        """hand at least the first `n` rows to the views"""
+        n = min(n, len(self.items)) - self._loaded
+        if n <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._loaded, self._loaded + n - 1)
+        self._loaded += n
+        self.endInsertRows()
+
+    def set_items(self, items):
+        self.beginResetModel()
+        self.items = items
+        self._loaded = min(len(items), self.batch)
+        self.endResetModel()
+
+
+class GChoiceModel(_LazyListModel):
+    """the model shared by all widgets of one `click.Choice`"""
+
+    def __init__(self, choices, parent=None):
+        super(GChoiceModel, self).__init__([str(c) for c in choices], parent)
+        self._folded = None
+        self._keys = None
+        self._order = None
+
+    def _build_index(self):
+        self._folded = [c.casefold() for c in self.items]
+        self._order = sorted(range(len(self._folded)), key=self._folded.__getitem__)
+        self._keys = [self._folded[i] for i in self._order]
+
+    def match_rows(self, text, candidates=None):
+        """rows starting with `text` followed by rows containing it
+
+        `candidates` restricts the substring scan, e.g. to the matches of a
+        shorter query.
+        """
+        if self._folded is None:
+            self._build_index()
+        text = text.casefold()
+        if not text:
+            return list(range(len(self.items)))
+        lo = bisect_left(self._keys, text)
+        hi = bisect_left(self._keys, text + "\U0010ffff")
+        prefix = sorted(self._order[lo:hi])
+        seen = set(prefix)
+        folded = self._folded
+        if candidates is None:
+            candidates = range(len(folded))
+        return prefix + [i for i in candidates if i not in seen and text in folded[i]]
+
+
+class GChoiceFilterModel(_LazyListModel):
+    def __init__(self, source, parent=None):
+        super(GChoiceFilterModel, self).__init__((), parent)
+        self.source = source
+        self.rows = []
+        self._text = ""
+
+    @QtCore.Slot(str)
+    def set_filter(self, text):
+        candidates = None
+        if self._text and text.casefold().startswith(self._text):
+            candidates = self.rows
+        self.rows = self.source.match_rows(text, candidates) if text else []
+        self._text = text.casefold()
+        self.set_items([self.source.items[i] for i in self.rows])
+
+
+def choice_model(choice):
+    """return the model of `choice`, creating it on first use"""
+    model = getattr(choice, "_gmodel", None)
+    if model is None:
+        model = GChoiceModel(choice.choices)
+        choice._gmodel = model
+    return model
+
+
 class GChoiceComboBox(click.types.Choice):
     def to_widget(self, opt):
         cb = _InputComboBox()
-        cb.addItems(self.choices)
+        model = choice_model(self)
+        if len(model.items) > _CHOICE_FILTER_THRESHOLD:
+            # the completer has to be in place before the model is set, or the
+            # default one would fetch every choice
+            cb.setEditable(True)
+            cb.setInsertPolicy(QtWidgets.QComboBox.InsertPolicy.NoInsert)
+            filter_model = GChoiceFilterModel(model, cb)
+            completer = QtWidgets.QCompleter(filter_model, cb)
+            completer.setCompletionMode(
+                QtWidgets.QCompleter.CompletionMode.UnfilteredPopupCompletion
+            )
+            cb.setCompleter(completer)
+            cb.lineEdit().textEdited.connect(filter_model.set_filter)
+
+            def pick(index):
+                # the filter model is no proxy of the combo's model, so Qt
+                # only finds the text in the rows loaded so far
+                row = filter_model.rows[index.row()]
+                model.load(row + 1)
+                cb.setCurrentIndex(row)
+
+            completer.activated[QtCore.QModelIndex].connect(pick)
+        cb.setModel(model)
 
         def to_command():
             return [opt.opts[0], cb.currentText()]
@@ -475,7 +916,7 @@ def count_option(opt):
     sb = _InputSpinBox()
 
     def to_command():
-        return [opt.opts[0]] * int(sb.text())
+        return [opt.opts[0]] * sb.value()
 
     return [sb], to_command
 
@@ -486,8 +927,8 @@ class GTupleGListView(click.Tuple):
 
         def to_command():
             _ = [opt.opts[0]]
-            for idx in range(view.model.rowCount()):
-                _.append(view.model.item(idx).text())
+            for idx in range(view._model.rowCount()):
+                _.append(view._model.item(idx).text())
             return _
 
         return [view], to_command
@@ -498,8 +939,8 @@ def multi_text_argument(opt):
 
     def to_command():
         _ = []
-        for idx in range(value.model.rowCount()):
-            _.append(value.model.item(idx).text())
+        for idx in range(value._model.rowCount()):
+            _.append(value._model.item(idx).text())
         return _
 
     # return [QtWidgets.QLabel(opt.name), value], to_command
@@ -559,7 +1000,8 @@ class GMultiple(QtWidgets.QGridLayout):
     def __init__(self, cl, opt):
         super().__init__()
         self._class = cl
-        self._opt = opt
+        # `init_add` clears the default for added rows, not on the command
+        self._opt = copy(opt)
         self._to_command = []
         self.init_add()
 
@@ -626,6 +1068,9 @@ class GMultiple(QtWidgets.QGridLayout):
 
 
 def _to_widget(opt):
+    if opt.default is _UNSET:
+        opt = copy(opt)
+        opt.default = None
     # customed widget
     if isinstance(opt.type, click.types.FuncParamType):
         if hasattr(opt.type.func, "to_widget"):
@@ -673,6 +1118,287 @@ def generate_sysargv(cmd_list):
     return argv_list
 
 
+def _text(value):
+    # what a line edit starts with for default `value`
+    return str(value) if value else ""
+
+
+def _arg(value):
+    return "" if value is None else str(value)
+
+
+def _slider_value(opt, value):
+    lo, hi = opt.type.min or 0, opt.type.max or 0
+    if isinstance(value, int) and lo <= value <= hi:
+        return value
+    return (lo + hi) // 2
+
+
+def _widget_argv(opt):
+    """``(initial value, value -> argv)`` for the widget `opt_to_widget` uses"""
+    flag = opt.opts[0]
+    if opt.nargs > 1:
+        if hasattr(opt.default, "__len__"):
+            initial = list(opt.default)
+        else:
+            initial = [None] * opt.nargs
+        return initial, lambda v: [flag] + [_arg(x) for x in v]
+    if getattr(opt, "is_bool_flag", False):
+        return bool(opt.default), lambda v: [flag] if v else opt.secondary_opts
+    if getattr(opt, "count", False):
+        return 0, lambda v: [flag] * int(v)
+    if opt.multiple:
+        # one row per default, as `GMultiple` does
+        try:
+            defaults = list(opt.default)
+        except TypeError:
+            defaults = [opt.default]
+        rows = []
+        for default in defaults:
+            row = copy(opt)
+            row.multiple = False
+            row.default = default
+            initial, one = _widget_argv(row)
+            rows.append(initial)
+        if not rows:
+            row = copy(opt)
+            row.multiple = False
+            one = _widget_argv(row)[1]
+        return rows, lambda v: [a for value in v for a in one(value)]
+    if isinstance(opt.type, click.types.Choice):
+        # the combo box starts on the first choice, whatever the default
+        choices = opt.type.choices
+        return (_arg(choices[0]) if choices else ""), lambda v: [flag, _arg(v)]
+    if isinstance(opt.type, click.types.IntRange):
+        # only the slider's start is coerced, click checks the values set
+        return _slider_value(opt, opt.default), lambda v: [flag, _arg(v)]
+    return _text(opt.default), lambda v: [flag, _arg(v)]
+
+
+def param_argv(opt):
+    """``(initial value, value -> argv)`` of `opt` in a `CommandForm`
+
+    The argv is the one the widget built by `_to_widget` gives for the same
+    value. Custom widgets are treated as line edits.
+    """
+    if opt.default is _UNSET or callable(opt.default):
+        opt = copy(opt)
+        if callable(opt.default):
+            func = opt.default
+            opt.default = _default_cache.get(func, _missing)
+            if opt.default is _missing:
+                opt.default = _default_cache[func] = func()
+        else:
+            opt.default = None
+    if not isinstance(opt, click.core.Argument):
+        return _widget_argv(opt)
+    if opt.nargs == 1:
+        initial, to_argv = _widget_argv(opt)
+        return initial, lambda v: to_argv(v)[1:]
+    if hasattr(opt.default, "__len__"):
+        initial = list(opt.default)
+    else:
+        initial = [None] * max(opt.nargs, 0)
+    return initial, lambda v: [_arg(x) for x in v]
+
+
+def check_argv(func, argv):
+    """the message click fails `argv` of command `func` with, None if valid"""
+    try:
+        ctx = func.make_context(argv[0], argv[1:])
+        contexts = [ctx]
+        while isinstance(ctx.command, click.MultiCommand):
+            group = ctx.command
+            args = list(getattr(ctx, "_protected_args", None) or []) + ctx.args
+            if not args:
+                break
+            while args:
+                _, cmd, args = group.resolve_command(ctx, args)
+                if cmd is None:
+                    break
+                sub = cmd.make_context(
+                    cmd.name,
+                    args,
+                    parent=ctx,
+                    allow_extra_args=group.chain,
+                    allow_interspersed_args=not group.chain,
+                )
+                contexts.append(sub)
+                args = sub.args if group.chain else []
+            ctx = sub
+    except click.exceptions.Exit:
+        return None
+    except click.exceptions.ClickException as e:
+        return e.format_message()
+    for ctx in reversed(contexts):
+        ctx.close()
+    return None
+
+
+_CHECK_CACHE_SIZE = 4096
+
+
+def _raw_value(para, argv):
+    """the value click parses from `argv`, the part of `para`
+
+    None when the parameter is left out, `_missing` when it has nothing to
+    convert (flags and counters).
+    """
+    if isinstance(para, click.core.Argument):
+        if not argv:
+            return None
+        return argv[0] if para.nargs == 1 else tuple(argv)
+    if getattr(para, "is_flag", False) or getattr(para, "count", False):
+        return _missing
+    if not argv:
+        return None
+    if para.nargs > 1:
+        # a tuple option is one list view, even with multiple=True
+        value = tuple(argv[1:])
+        return (value,) if para.multiple else value
+    if para.multiple:
+        return tuple(argv[1::2])
+    return argv[1]
+
+
+def param_check(para, ctx):
+    """``argv -> error`` converting the value of `para` as click would
+
+    Each distinct argv is converted once.
+    """
+    cache = {}
+
+    def check(argv):
+        key = tuple(argv)
+        if key in cache:
+            return cache[key]
+        error = None
+        raw = _raw_value(para, argv)
+        try:
+            if raw is None:
+                if para.required:
+                    raise click.exceptions.MissingParameter(ctx=ctx, param=para)
+            elif raw is not _missing:
+                para.type_cast_value(ctx, raw)
+        except click.exceptions.BadParameter as e:
+            error = e.format_message()
+        if len(cache) < _CHECK_CACHE_SIZE:
+            cache[key] = error
+        return error
+
+    return check
+
+
+class CommandForm(object):
+    """the form of command `func`, without widgets
+
+    Values are set by parameter name and `argv` returns what
+    `generate_sysargv` gives for the same values in the GUI, so command
+    lines can be generated and checked in bulk::
+
+        form = CommandForm(cli).command("example_cmd")
+        form["hello"] = "bo"
+        form.argv()
+        errors = [e for _, e in form.validate_many(configs) if e]
+    """
+
+    def __init__(self, func, parent=None):
+        self.func = func
+        self.parent = parent
+        self._to_argv = {}
+        self._checks = {}
+        self.values = {}
+        ctx = click.Context(func)
+        for para in func.params:
+            self.values[para.name], self._to_argv[para.name] = param_argv(para)
+            self._checks[para.name] = param_check(para, ctx)
+        self._commands = {}
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+    def __setitem__(self, name, value):
+        if name not in self.values:
+            raise KeyError(f"{self.func.name} has no parameter {name!r}")
+        self.values[name] = value
+
+    def set(self, **values):
+        for name, value in values.items():
+            self[name] = value
+        return self
+
+    def command(self, name):
+        """the form of subcommand `name`"""
+        form = self._commands.get(name)
+        if form is None:
+            cmd = self.func.get_command(click.Context(self.func), name)
+            if cmd is None:
+                raise KeyError(f"{self.func.name} has no command {name!r}")
+            form = self._commands[name] = CommandForm(cmd, self)
+        return form
+
+    def root(self):
+        return self if self.parent is None else self.parent.root()
+
+    def _values(self, values):
+        if not values:
+            return self.values
+        for name in values:
+            if name not in self.values:
+                raise KeyError(f"{self.func.name} has no parameter {name!r}")
+        return dict(self.values, **values)
+
+    def own_argv(self, values=None):
+        """the part of the command line for this command only"""
+        values = self._values(values)
+        argv = [self.func.name]
+        for name, to_argv in self._to_argv.items():
+            argv += to_argv(values[name])
+        return argv
+
+    def _check(self, values=None):
+        """``(own argv, error)``, checking each value on its own"""
+        values = self._values(values)
+        argv = [self.func.name]
+        error = None
+        for name, to_argv in self._to_argv.items():
+            part = to_argv(values[name])
+            argv += part
+            if error is None:
+                error = self._checks[name](part)
+        return argv, error
+
+    def argv(self, **values):
+        """the command line, `values` overriding the ones set on this form"""
+        prefix = [] if self.parent is None else self.parent.argv()
+        return prefix + self.own_argv(values)
+
+    def validate(self, **values):
+        """the error click reports for `argv`, None if there is none"""
+        return check_argv(self.root().func, self.argv(**values))
+
+    def validate_many(self, configs):
+        """yield ``(argv, error)`` for every dict of values in `configs`
+
+        Unlike `validate`, the command line is not parsed as a whole: every
+        value is converted by the type of its parameter, which reports the
+        same errors but each distinct value is only converted once.
+        """
+        prefix, error = [], None
+        parents = []
+        form = self.parent
+        while form is not None:
+            parents.insert(0, form)
+            form = form.parent
+        for form in parents:
+            argv, parent_error = form._check()
+            prefix += argv
+            error = error or parent_error
+        for values in configs:
+            argv, own_error = self._check(values)
+            yield prefix + argv, error or own_error
+
+
 class _Spliter(QtWidgets.QFrame):
     def __init__(self, parent=None):
         super(_Spliter, self).__init__(parent=parent)
@@ -707,18 +1433,109 @@ class _InputSpinBox(QtWidgets.QSpinBox):
     pass
 
 
+_default_cache = {}
+_default_pool = None
+
+
+def default_pool():
+    """the worker pool resolving callable defaults"""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = QtCore.QThreadPool()
+    return _default_pool
+
+
+def _iter_widgets(items):
+    for w in items:
+        if isinstance(w, QtWidgets.QLayout):
+            yield from _iter_widgets(
+                w.itemAt(i).widget() or w.itemAt(i).layout() for i in range(w.count())
+            )
+        elif w is not None:
+            yield w
+
+
+def _delete_row(layout, items):
+    for w in items:
+        if isinstance(w, QtWidgets.QLayout):
+            for c in _iter_widgets([w]):
+                c.hide()
+                c.deleteLater()
+            layout.removeItem(w)
+            w.deleteLater()
+        else:
+            layout.removeWidget(w)
+            w.hide()
+            w.deleteLater()
+
+
+class _DefaultSignals(QtCore.QObject):
+    loaded = QtCore.Signal(int, object, object)
+
+
+class _DefaultRunnable(QtCore.QRunnable):
+    def __init__(self, layout, k, func):
+        super(_DefaultRunnable, self).__init__()
+        self.func = func
+        self.k = k
+        # the layout may be deleted before the default is computed, Qt drops
+        # the connection then while emitting on its own signal would crash
+        self.signals = _DefaultSignals()
+        self.signals.loaded.connect(layout.defaultLoaded)
+        self.signal = self.signals.loaded
+
+    @QtCore.Slot()
+    def run(self):
+        try:
+            value = self.func()
+        except Exception as e:
+            logging.error(f"failed to compute default: {e!r}")
+            value = None
+        self.signal.emit(self.k, self.func, value)
+
+
+def param_signature(para):
+    """the attributes the widgets of `para` are built from"""
+    default = para.default
+    if callable(default):
+        default = getattr(default, "__qualname__", default)
+    return (
+        type(para),
+        type(para.type),
+        repr(para.type),
+        para.name,
+        tuple(para.opts),
+        tuple(para.secondary_opts),
+        para.nargs,
+        para.multiple,
+        repr(default),
+        getattr(para, "help", None),
+        getattr(para, "show_name", None),
+        getattr(para, "is_bool_flag", False),
+        getattr(para, "count", False),
+        getattr(para, "hide_input", False),
+    )
+
+
 class CommandLayout(QtWidgets.QGridLayout):
+    defaultLoaded = QtCore.Signal(int, object, object)
+
     def __init__(self, func, run_exit, parent_layout=None):
         super(CommandLayout, self).__init__()
         self.parent_layout = parent_layout
         self.func = func
         self.run_exit = run_exit
+        self.params = []
+        self.lazy_defaults = []
+        self.defaultLoaded.connect(self.set_default)
         if func.help:
             label = _HelpLabel(func.help)
             label.setWordWrap(True)
             self.addWidget(label, 0, 0, 1, 2)
             frame = _Spliter()
             self.addWidget(frame, 1, 0, 1, 2)
+        self.param_layout = QtWidgets.QGridLayout()
+        self.addLayout(self.param_layout, 2, 0, 1, 2)
         self.params_func, self.widgets = self.append_opts(self.func.params)
 
     def add_sysargv(self):
@@ -732,27 +1549,123 @@ class CommandLayout(QtWidgets.QGridLayout):
     def append_opts(self, opts):
         params_func = []
         widgets = []
-        for i, para in enumerate(opts, self.rowCount()):
-            result = _to_widget(para)
-
-            assert result is not None
-
-            widget, value_func = result
-
+        for para in opts:
+            k = len(self.params)
+            self.params.append(para)
+            widget, value_func = self._build_row(k, para)
             widgets.append(widget)
             params_func.append(value_func)
-            for idx, w in enumerate(widget):
-                if isinstance(w, QtWidgets.QLayout):
-                    self.addLayout(w, i, idx)
-                else:
-                    self.addWidget(w, i, idx)
+            self._add_row(k, widget)
         return params_func, widgets
 
-    def generate_cmd_button(self, label, cmd_slot, tooltip=""):
+    def _build_row(self, k, para):
+        loading = False
+        if callable(para.default):
+            self.lazy_defaults.append(k)
+            func = para.default
+            para = copy(para)
+            para.default = _default_cache.get(func, _missing)
+            if para.default is _missing:
+                loading = True
+                self.load_default(k, func)
+                para.default = None
+        result = _to_widget(para)
+
+        assert result is not None
+
+        widget, value_func = result
+        if loading:
+            self._set_loading(widget)
+        return widget, value_func
+
+    def _add_row(self, i, widget):
+        for idx, w in enumerate(widget):
+            if isinstance(w, QtWidgets.QLayout):
+                self.param_layout.addLayout(w, i, idx)
+            else:
+                self.param_layout.addWidget(w, i, idx)
+
+    @staticmethod
+    def _set_loading(widget):
+        for w in _iter_widgets(widget[1:]):
+            w.setEnabled(False)
+            if isinstance(w, QtWidgets.QLineEdit):
+                w.setPlaceholderText("loading...")
+
+    def replace_row(self, k, opt):
+        """rebuild the widgets of the `k`-th parameter from `opt`"""
+        _delete_row(self.param_layout, self.widgets[k])
+        widget, value_func = _to_widget(opt)
+        self._add_row(k, widget)
+        self.widgets[k] = widget
+        self.params_func[k] = value_func
+
+    def update_func(self, func):
+        """switch to `func`, rebuilding only the rows of changed parameters
+
+        Rows whose `param_signature` is unchanged keep their widgets, and
+        with them the values entered so far.
+        """
+        old = {}
+        for k, para in enumerate(self.params):
+            old[para.name] = (k, param_signature(para))
+        rows = []
+        kept = set()
+        for para in func.params:
+            hit = old.get(para.name)
+            if hit is not None and hit[1] == param_signature(para):
+                kept.add(hit[0])
+                rows.append((para, self.widgets[hit[0]], self.params_func[hit[0]]))
+            else:
+                rows.append((para, None, None))
+        for k, widget in enumerate(self.widgets):
+            if k not in kept:
+                _delete_row(self.param_layout, widget)
+            else:
+                for w in widget:
+                    if isinstance(w, QtWidgets.QLayout):
+                        self.param_layout.removeItem(w)
+        self.func = func
+        self.params, self.params_func, self.widgets = [], [], []
+        self.lazy_defaults = []
+        for k, (para, widget, value_func) in enumerate(rows):
+            self.params.append(para)
+            if widget is None:
+                widget, value_func = self._build_row(k, para)
+            elif callable(para.default):
+                self.lazy_defaults.append(k)
+            self.widgets.append(widget)
+            self.params_func.append(value_func)
+            self._add_row(k, widget)
+        return len(rows) - len(kept)
+
+    def load_default(self, k, func):
+        default_pool().start(_DefaultRunnable(self, k, func))
+
+    @QtCore.Slot(int, object, object)
+    def set_default(self, k, func, value):
+        _default_cache[func] = value
+        if k >= len(self.params) or self.params[k].default is not func:
+            return
+        opt = copy(self.params[k])
+        opt.default = value
+        self.replace_row(k, opt)
+
+    @QtCore.Slot()
+    def refresh_defaults(self):
+        """recompute every callable default of this command"""
+        for k in self.lazy_defaults:
+            func = self.params[k].default
+            _default_cache.pop(func, None)
+            self._set_loading(self.widgets[k])
+            self.load_default(k, func)
+
+    def generate_cmd_button(self, label, cmd_slot, tooltip="", sysargv=True):
         button = QtWidgets.QPushButton(label)
         button.setToolTip(tooltip)
-        button.clicked.connect(self.clean_sysargv)
-        button.clicked.connect(self.add_sysargv)
+        if sysargv:
+            button.clicked.connect(self.clean_sysargv)
+            button.clicked.connect(self.add_sysargv)
         button.clicked.connect(cmd_slot)
         return button
 
@@ -788,138 +1701,2932 @@ class CommandLayout(QtWidgets.QGridLayout):
         sys.argv = []
 
 
+_job_ids = itertools.count(1)
+
+
+class JobError(object):
+    def __init__(self, job_id, argv, message, traceback=""):
+        self.job_id = job_id
+        self.argv = argv
+        self.message = message
+        self.traceback = traceback
+        self.time = time.time()
+
+
+class JobSignals(QtCore.QObject):
+    """job events, delivered to the GUI thread whichever thread emits them"""
+
+    failed = QtCore.Signal(object)
+    started = QtCore.Signal(int, object)
+    progress = QtCore.Signal(int, object)
+    finished = QtCore.Signal(int, bool)
+    stages = QtCore.Signal(int, object)
+    resources = QtCore.Signal(int, object)
+    result = QtCore.Signal(int, object)
+
+
+_PROGRESS_INTERVAL = 0.1
+# the job running in the current thread (or asyncio task)
+_current_job = contextvars.ContextVar("quick_current_job", default=None)
+
+
+_event_loop = None
+_event_loop_lock = threading.Lock()
+
+
+def event_loop():
+    """the asyncio loop shared by all coroutine commands
+
+    It runs forever on a daemon thread, started on first use.
+    """
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_event_loop.run_forever, name="quick-asyncio", daemon=True
+            ).start()
+    return _event_loop
+
+
+def is_async_command(func):
+    return inspect.iscoroutinefunction(getattr(func, "callback", None))
+
+
 class RunCommand(QtCore.QRunnable):
-    def __init__(self, func, run_exit):
+    def __init__(self, func, run_exit, signals=None, argv=None, is_async=False):
         super(RunCommand, self).__init__()
         self.func = func
         self.run_exit = run_exit
+        self.signals = signals
+        self.is_async = is_async
+        self.job_id = next(_job_ids)
+        # freeze the command line, sys.argv is rebuilt by the next click
+        self.argv = list(sys.argv if argv is None else argv)
+        self.cancelled = False
+        self.done = False
+        self.future = None
+        # stage names when running a chained group as a streaming pipeline
+        self.pipeline = None
+        self.pipeline_stop = None
+        # thread running the command, sampled by `ResourceMonitor`
+        self.native_id = None
+        self.usage = ResourceUsage()
+        # `OutputTee` persisting what the job prints
+        self.tee = None
+        # `quick_worker.WorkerPool` running the command instead of this process
+        self.remote = None
+        self.remote_run = None
+        # what the command returned, with `run_exit` False
+        self.result = None
+        self._last_progress = 0.0
+        self._last_stages = 0.0
 
     @QtCore.Slot()
     def run(self):
-        cmd_str = " ".join(sys.argv)
+        cmd_str = " ".join(self.argv)
         logging.info(
             f"Running: {cmd_str}",
         )
+        if self.signals is not None:
+            self.signals.started.emit(self.job_id, self.argv)
+        if self.tee is not None:
+            self.tee.open_job(self.job_id, self.argv)
+        if self.remote is not None:
+            # only the wall time is known here
+            self.usage.start(None)
+            self.remote_run = self.remote.submit(
+                self.argv, self._remote_write, self._remote_done, self.func.name
+            )
+            return
+        token = _current_job.set(self)
+        if not self.is_async:
+            # coroutines run on the shared loop, their cpu is not their own
+            self.native_id = threading.get_native_id()
+        self.usage.start(self.native_id)
+        ok = False
         try:
-            self.func(standalone_mode=self.run_exit)
+            if self.cancelled:
+                raise click.exceptions.Abort()
+            rv = self.func(
+                args=self.argv[1:],
+                prog_name=self.argv[0] if self.argv else None,
+                # click would exit before the coroutine ever runs
+                standalone_mode=self.run_exit and not self.is_async,
+            )
+            if inspect.iscoroutine(rv):
+                # the task copies the context, `_current_job` included
+                self.future = asyncio.run_coroutine_threadsafe(rv, event_loop())
+                self.future.add_done_callback(self._async_done)
+                return
+            self.set_result(rv)
+            ok = True
             logging.info(f"Successfully executed: {cmd_str}")
-        except click.exceptions.BadParameter as bpe:
-            # warning message
-            msg = QtWidgets.QMessageBox()
-            msg.setIcon(QtWidgets.QMessageBox.Icon.Warning)
-            msg.setText(bpe.format_message())
-            msg.exec()
+        except click.exceptions.Abort:
+            self.report("cancelled")
+        except click.exceptions.ClickException as bpe:
+            self.report(bpe.format_message())
         except Exception as bpe:
             logging.error(bpe)
-            msg = QtWidgets.QMessageBox()
-            msg.setIcon(QtWidgets.QMessageBox.Icon.Warning)
-            msg.setText(repr(bpe))
-            msg.exec()
-
+            self.report(repr(bpe), traceback.format_exc())
+        finally:
+            _current_job.reset(token)
+        self.finish(ok)
+
+    def _async_done(self, future):
+        ok = False
+        if future.cancelled():
+            self.report("cancelled")
+        elif future.exception() is not None:
+            e = future.exception()
+            logging.error(e)
+            self.report(
+                repr(e),
+                "".join(traceback.format_exception(type(e), e, e.__traceback__)),
+            )
+        else:
+            self.set_result(future.result())
+            ok = True
+            logging.info(f"Successfully executed: {' '.join(self.argv)}")
+        self.finish(ok)
+
+    def set_result(self, rv):
+        self.result = rv
+        if rv is not None and self.signals is not None:
+            self.signals.result.emit(self.job_id, rv)
+
+    def _remote_write(self, text):
+        # called by a thread of the pool, not running as this job
+        sys.stdout.write(text)
+        if self.tee is not None:
+            self.tee.write(self.job_id, text)
+
+    def _remote_done(self, ok, error):
+        """end the job as its worker reports; the protocol only carries the
+        exit status, so a remote job never produces a `result`"""
+        if ok:
+            logging.info(f"Successfully executed: {' '.join(self.argv)}")
+        else:
+            self.report(error or "failed on a worker")
+        self.finish(ok)
+
+    def finish(self, ok):
+        self.usage.stop()
+        self.done = True
+        if self.tee is not None:
+            self.tee.close_job(self.job_id)
+        if self.signals is not None:
+            self.signals.resources.emit(self.job_id, self.usage)
+            self.signals.finished.emit(self.job_id, ok)
+
+    def cancel(self):
+        """stop the job
+
+        Coroutine jobs are cancelled right away, others raise `click.Abort`
+        at their next progress update, pipelines as soon as their stages
+        notice. Remote jobs are only cancelled before
+        a worker starts them.
+        """
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+        if self.remote_run is not None:
+            self.remote.cancel(self.remote_run)
+        if self.pipeline_stop is not None:
+            self.pipeline_stop.set()
+
+    def report_progress(self, pos, length, label, elapsed, force=False):
+        """forward progress to the GUI at most every `_PROGRESS_INTERVAL` s"""
+        if self.cancelled:
+            raise click.exceptions.Abort()
+        now = time.monotonic()
+        if self.signals is None or (
+            not force and now - self._last_progress < _PROGRESS_INTERVAL
+        ):
+            return
+        self._last_progress = now
+        self.signals.progress.emit(self.job_id, (pos, length, label, elapsed))
+
+    def report_stages(self, stats, force=False):
+        """like `report_progress`, for ``(name, items, elapsed)`` per stage"""
+        now = time.monotonic()
+        if self.signals is None or (
+            not force and now - self._last_stages < _PROGRESS_INTERVAL
+        ):
+            return
+        self._last_stages = now
+        self.signals.stages.emit(self.job_id, stats)
 
-class GCommand(click.Command):
-    def __init__(self, new_thread=True, *arg, **args):
-        super(GCommand, self).__init__(*arg, **args)
-        self.new_thread = new_thread
+    def report(self, message, tb=""):
+        """hand the error over to the GUI thread and return at once"""
+        if self.signals is None:
+            logging.error(f"job {self.job_id} failed: {message}")
+            return
+        self.signals.failed.emit(JobError(self.job_id, self.argv, message, tb))
 
 
-class GOption(click.Option):
-    def __init__(self, *arg, show_name=_missing, **args):
-        super(GOption, self).__init__(*arg, **args)
-        self.show_name = show_name
+class ErrorPanel(QtWidgets.QWidget):
+    """non-modal list of failed jobs, with the traceback of the selected one"""
 
+    def __init__(self, parent=None):
+        super(ErrorPanel, self).__init__(parent)
+        self.setWindowTitle("Errors")
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.errors = QtWidgets.QTreeWidget()
+        self.errors.setRootIsDecorated(False)
+        self.errors.setHeaderLabels(["job", "time", "command", "error"])
+        self.detail = QtWidgets.QPlainTextEdit()
+        self.detail.setReadOnly(True)
+        clear = QtWidgets.QPushButton("&Clear")
+        clear.clicked.connect(self.errors.clear)
+        clear.clicked.connect(self.detail.clear)
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Orientation.Vertical)
+        splitter.addWidget(self.errors)
+        splitter.addWidget(self.detail)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(splitter)
+        layout.addWidget(clear, 0, QtCore.Qt.AlignmentFlag.AlignRight)
+        self.errors.currentItemChanged.connect(self.show_detail)
+
+    @QtCore.Slot(object)
+    def add_error(self, err):
+        item = QtWidgets.QTreeWidgetItem(
+            [
+                str(err.job_id),
+                time.strftime("%H:%M:%S", time.localtime(err.time)),
+                " ".join(err.argv),
+                err.message,
+            ]
+        )
+        item.setData(0, _GTypeRole, err)
+        self.errors.addTopLevelItem(item)
+        if self.errors.currentItem() is None:
+            self.errors.setCurrentItem(item)
+        self.show()
 
-class GuiStream(QtCore.QObject):
-    textWritten = QtCore.Signal(str)
+    def show_detail(self, item, previous=None):
+        if item is None:
+            return
+        err = item.data(0, _GTypeRole)
+        self.detail.setPlainText(
+            f"job {err.job_id}: {' '.join(err.argv)}\n\n{err.message}\n\n{err.traceback}"
+        )
 
-    def flush(self):
-        pass
 
-    def write(self, text):
-        self.textWritten.emit(str(text))
+_STAGE_QUEUE_SIZE = 64
+_STAGE_POLL = 0.1
+_stage_end = object()
 
 
-class OutputEdit(QtWidgets.QTextEdit):
-    def print(self, text):
-        cursor = self.textCursor()
-        cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
-        cursor.insertText(text)
-        self.setTextCursor(cursor)
-        self.ensureCursorVisible()
+class _Stage(object):
+    """run a chain processor on its own thread behind a bounded queue
 
+    Calling the stage with the upstream iterable starts the thread and
+    returns an iterator over the processor's output, so the result callback
+    of the group keeps chaining processors as it would without quick.
+    """
 
-class App(QtWidgets.QWidget):
-    def __init__(
-        self,
-        func,
-        run_exit,
-        new_thread,
-        output="gui",
-        left=10,
-        top=10,
-        width=400,
-        height=140,
-    ):
-        """
-        Parameters
-        ----------
-        output : str
-            'gui': [default] redirect screen output to the gui
-            'term': do nothing
-        """
-        super().__init__()
-        self.new_thread = new_thread
-        self.title = func.name
-        self.func = func
-        self.initUI(run_exit, QtCore.QRect(left, top, width, height))
-        self.threadpool = QtCore.QThreadPool()
-        self.outputEdit = self.initOutput(output)
+    def __init__(self, processor, name, pipeline):
+        self.processor = processor
+        self.name = name
+        self.pipeline = pipeline
+        self.count = 0
+        # set when the output of this stage is no longer read
+        self.closed = threading.Event()
+
+    def __call__(self, upstream=()):
+        out = queue.Queue(_STAGE_QUEUE_SIZE)
+        ctx = contextvars.copy_context()
+        thread = threading.Thread(
+            target=ctx.run,
+            args=(self._produce, upstream, out),
+            name=f"quick-stage-{self.name}",
+            daemon=True,
+        )
+        thread.start()
+        return self._consume(out, self is self.pipeline.stages[-1])
 
-    def initOutput(self, output):
-        if output == "gui":
-            sys.stdout = GuiStream()
-            sys.stderr = sys.stdout
-            text = OutputEdit()
-            text.setReadOnly(True)
-            sys.stdout.textWritten.connect(text.print)
-            sys.stdout.textWritten.connect(text.show)
-            return text
+    def _produce(self, upstream, out):
+        try:
+            items = self.processor(upstream)
+            for item in items:
+                if not self.pipeline.put(out, item, self):
+                    # nothing reads it anymore
+                    getattr(items, "close", lambda: None)()
+                    return
+        except BaseException as e:
+            self.pipeline.fail(e)
         else:
-            return None
+            self.pipeline.put(out, (_stage_end, None), self)
 
-    def closeEvent(self, event):
-        app = QtWidgets.QApplication.instance()
-        app.quit()
+    def _consume(self, out, last):
+        # stats are only emitted by whoever drains the last stage, the job
+        # thread, so that the panel never receives them out of order
+        stop = self.pipeline.stop
+        ended = False
+        try:
+            while True:
+                try:
+                    item = out.get(timeout=_STAGE_POLL)
+                except queue.Empty:
+                    item = _stage_end
+                if stop.is_set():
+                    raise self.pipeline.error or click.exceptions.Abort()
+                if item is _stage_end:
+                    continue
+                if type(item) is tuple and len(item) == 2 and item[0] is _stage_end:
+                    ended = True
+                    return
+                self.count += 1
+                if last:
+                    self.pipeline.tick()
+                yield item
+        finally:
+            # left early, this stage and those upstream must not wait on a
+            # full queue; a processor reading only part of its input is fine
+            if not ended:
+                self.pipeline.close(self)
+
+
+class _Pipeline(object):
+    def __init__(self, job, processors):
+        names = job.pipeline
+        if len(names) != len(processors):
+            names = [
+                getattr(p, "__name__", f"stage {i}") for i, p in enumerate(processors)
+            ]
+        self.job = job
+        self.start = time.monotonic()
+        self.stages = [_Stage(p, n, self) for p, n in zip(processors, names)]
+        # set when a stage fails or the job is cancelled
+        self.stop = threading.Event()
+        self.error = None
+        job.pipeline_stop = self.stop
+
+    def put(self, out, item, stage):
+        """queue the `item` of `stage` unless it stops first, False if it did"""
+        while not (self.stop.is_set() or stage.closed.is_set()):
+            try:
+                out.put(item, timeout=_STAGE_POLL)
+                return True
+            except queue.Full:
+                pass
+        return False
 
-    def initCommandUI(self, func, run_exit, parent_layout=None):
-        opt_set = CommandLayout(func, run_exit, parent_layout=parent_layout)
-        if isinstance(func, click.MultiCommand):
-            tabs = _InputTabWidget()
-            for cmd, f in func.commands.items():
-                sub_opt_set = self.initCommandUI(f, run_exit, parent_layout=opt_set)
-                tab = QtWidgets.QWidget()
-                tab.setLayout(sub_opt_set)
-                tabs.addTab(tab, cmd)
-            opt_set.addWidget(tabs, opt_set.rowCount(), 0, 1, 2)
-            # return opt_set
-        elif isinstance(func, click.Command):
-            new_thread = getattr(func, "new_thread", self.new_thread)
-            opt_set.add_cmd_buttons(
-                args=[
-                    {
-                        "label": "&Run",
-                        "cmd_slot": partial(self.run_cmd, new_thread=new_thread),
-                        "tooltip": "run command",
-                    },
+    def close(self, stage):
+        for s in self.stages[: self.stages.index(stage) + 1]:
+            s.closed.set()
+
+    def fail(self, error):
+        if self.error is None:
+            self.error = error
+        self.stop.set()
+
+    def tick(self, force=False):
+        elapsed = time.monotonic() - self.start
+        self.job.report_stages(
+            [(s.name, s.count, elapsed) for s in self.stages], force=force
+        )
+
+
+def install_pipeline_hook(group):
+    """let pipeline jobs run the processors of chained `group` concurrently
+
+    Subcommands of a streaming chain return processors, callables taking and
+    returning an iterable. In a job started by `App.run_pipeline` each one is
+    wrapped into a `_Stage` before the group's result callback sees them.
+    """
+    attr = (
+        "_result_callback" if hasattr(group, "_result_callback") else "result_callback"
+    )
+    callback = getattr(group, attr)
+    if getattr(callback, "_quick_pipeline", False):
+        return
+
+    def result_callback(processors, *args, **kwargs):
+        job = _current_job.get()
+        if job is None or not job.pipeline or not all(callable(p) for p in processors):
+            if callback is None:
+                return processors
+            return callback(processors, *args, **kwargs)
+        pipeline = _Pipeline(job, processors)
+        stages = pipeline.stages
+        try:
+            if callback is not None:
+                return callback(stages, *args, **kwargs)
+            iterator = ()
+            for stage in stages:
+                iterator = stage(iterator)
+            for _ in iterator:
+                pass
+        finally:
+            pipeline.stop.set()
+            pipeline.tick(force=True)
+
+    result_callback._quick_pipeline = True
+    setattr(group, attr, result_callback)
+
+
+class PipelineBuilder(QtWidgets.QGroupBox):
+    """pick an ordered list of subcommands of a chained group and run them"""
+
+    def __init__(self, names, run, parent=None):
+        super(PipelineBuilder, self).__init__("Pipeline", parent)
+        self.run = run
+        self.available = _InputComboBox()
+        self.available.addItems(names)
+        add = QtWidgets.QPushButton("&Add")
+        remove = QtWidgets.QPushButton("Re&move")
+        run_button = QtWidgets.QPushButton("Run &pipeline")
+        self.stages = QtWidgets.QListWidget()
+        self.stages.setDragDropMode(
+            QtWidgets.QAbstractItemView.DragDropMode.InternalMove
+        )
+        self.stages.setToolTip("drag to reorder the stages")
+        layout = QtWidgets.QGridLayout(self)
+        layout.addWidget(self.available, 0, 0)
+        layout.addWidget(add, 0, 1)
+        layout.addWidget(self.stages, 1, 0, 1, 2)
+        layout.addWidget(remove, 2, 0)
+        layout.addWidget(run_button, 2, 1)
+        add.clicked.connect(lambda: self.stages.addItem(self.available.currentText()))
+        remove.clicked.connect(lambda: self.stages.takeItem(self.stages.currentRow()))
+        run_button.clicked.connect(self.run_stages)
+
+    def stage_names(self):
+        return [self.stages.item(i).text() for i in range(self.stages.count())]
+
+    @QtCore.Slot()
+    def run_stages(self):
+        names = self.stage_names()
+        if names:
+            self.run(names)
+
+
+class _NullStream(object):
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+_progress_hooks_installed = False
+
+
+def install_progress_hooks():
+    """route `click.progressbar` and tqdm bars of running jobs to the GUI
+
+    The bar classes are patched, so bars imported by name are covered too.
+    Outside of a job they render to the terminal as usual.
+    """
+    global _progress_hooks_installed
+    if _progress_hooks_installed:
+        return
+    _progress_hooks_installed = True
+
+    from click._termui_impl import ProgressBar
+
+    orig_init = ProgressBar.__init__
+    orig_render = ProgressBar.render_progress
+    orig_finish = ProgressBar.render_finish
+
+    def init(self, *args, **kwargs):
+        orig_init(self, *args, **kwargs)
+        if _current_job.get() is not None:
+            # render every step instead of only writing the label once
+            self._is_atty = True
+            self.is_hidden = False
+
+    def render_progress(self):
+        job = _current_job.get()
+        if job is None:
+            return orig_render(self)
+        job.report_progress(self.pos, self.length, self.label, time.time() - self.start)
+
+    def render_finish(self):
+        job = _current_job.get()
+        if job is None:
+            return orig_finish(self)
+        pos = self.pos + getattr(self, "_completed_intervals", 0)
+        job.report_progress(
+            pos, self.length, self.label, time.time() - self.start, force=True
+        )
+
+    ProgressBar.__init__ = init
+    ProgressBar.render_progress = render_progress
+    ProgressBar.render_finish = render_finish
+
+    try:
+        from tqdm import std as tqdm_std
+    except ImportError:
+        return
+    tqdm = tqdm_std.tqdm
+    orig_tqdm_init = tqdm.__init__
+    orig_display = tqdm.display
+
+    def tqdm_init(self, *args, **kwargs):
+        if _current_job.get() is not None and kwargs.get("file") is None:
+            kwargs["file"] = _NullStream()
+        orig_tqdm_init(self, *args, **kwargs)
+
+    def display(self, msg=None, pos=None):
+        job = _current_job.get()
+        if job is None:
+            return orig_display(self, msg, pos)
+        # tqdm displays once before `start_t` is set
+        start = getattr(self, "start_t", None)
+        job.report_progress(
+            self.n,
+            self.total,
+            self.desc,
+            time.time() - start if start else 0.0,
+            force=self.n == self.total,
+        )
+        return True
+
+    tqdm.__init__ = tqdm_init
+    tqdm.display = display
+
+
+def _format_seconds(seconds):
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def sample_thread(native_id):
+    """``(cpu s, rss, read, written)`` of a thread of this process
+
+    cpu is the thread's, rss and i/o counters are the process's. Read from
+    ``/proc``, None where there is none.
+    """
+    try:
+        with open(f"/proc/self/task/{native_id}/stat") as f:
+            # the command name may contain spaces
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * _PAGE_SIZE
+        io = {}
+        with open("/proc/self/io") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                io[key] = int(value)
+    except (OSError, IndexError, ValueError):
+        return None
+    cpu = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+    return cpu, rss, io.get("rchar", 0), io.get("wchar", 0)
+
+
+def _format_bytes(n):
+    for unit in ("B", "kB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class ResourceUsage(object):
+    """cpu and memory samples of one job, and their summary
+
+    Without ``/proc`` only the cpu time and wall time are known, measured
+    by the job's thread itself.
+    """
+
+    def __init__(self, maxlen=120):
+        self.cpu = collections.deque(maxlen=maxlen)
+        self.rss = collections.deque(maxlen=maxlen)
+        self.native_id = None
+        self.first = self.last = None
+        self.peak_rss = 0
+        self.wall = 0.0
+        self.cpu_seconds = 0.0
+        self._started = None
+        self._last_time = None
+        self._thread_time = None
+        self._lock = threading.Lock()
+
+    def start(self, native_id):
+        self.native_id = native_id
+        self._started = self._last_time = time.monotonic()
+        self._thread_time = time.thread_time()
+        if native_id is not None:
+            self.first = self.last = sample_thread(native_id)
+            if self.first is not None:
+                self.peak_rss = self.first[1]
+
+    def add(self, sample, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self.last is not None and now > self._last_time:
+                share = (sample[0] - self.last[0]) / (now - self._last_time)
+                self.cpu.append(100 * share)
+                self.rss.append(sample[1])
+            self.peak_rss = max(self.peak_rss, sample[1])
+            self.last = sample
+            self._last_time = now
+            self.wall = now - self._started
+
+    def sample(self):
+        if self.native_id is None or self._started is None:
+            return None
+        sample = sample_thread(self.native_id)
+        if sample is not None:
+            self.add(sample)
+        return sample
+
+    def stop(self):
+        """take the last sample, from the job's own thread"""
+        if self._started is None:
+            return
+        self.sample()
+        self.wall = time.monotonic() - self._started
+        if self.first is not None and self.last is not None:
+            self.cpu_seconds = self.last[0] - self.first[0]
+        elif self.native_id is not None:
+            self.cpu_seconds = time.thread_time() - self._thread_time
+
+    def summary(self):
+        read = written = rss_delta = 0
+        if self.first is not None and self.last is not None:
+            read = self.last[2] - self.first[2]
+            written = self.last[3] - self.first[3]
+            rss_delta = self.peak_rss - self.first[1]
+        return {
+            "wall": self.wall,
+            "cpu_seconds": self.cpu_seconds,
+            "peak_rss": self.peak_rss,
+            "rss_delta": rss_delta,
+            "read_bytes": read,
+            "written_bytes": written,
+        }
+
+    def summary_text(self):
+        s = self.summary()
+        return (
+            f"wall {s['wall']:.1f} s, cpu {s['cpu_seconds']:.2f} s\n"
+            f"peak rss {_format_bytes(s['peak_rss'])}"
+            f" ({_format_bytes(s['rss_delta'])} more)\n"
+            f"read {_format_bytes(s['read_bytes'])},"
+            f" written {_format_bytes(s['written_bytes'])}"
+        )
+
+
+class ResourceMonitor(QtCore.QObject):
+    """sample the running `jobs` every `interval` s, 0 turns it off
+
+    A sample is a few small ``/proc`` reads per job, done on the GUI
+    thread; the samples are shown through `JobSignals.resources`.
+    """
+
+    def __init__(self, jobs, signals, interval=0.5, parent=None):
+        super(ResourceMonitor, self).__init__(parent)
+        self.jobs = jobs
+        self.signals = signals
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.sample)
+        self.set_interval(interval)
+
+    def set_interval(self, interval):
+        if interval > 0:
+            self.timer.start(int(interval * 1000))
+        else:
+            self.timer.stop()
+
+    @QtCore.Slot()
+    def sample(self):
+        for job in list(self.jobs.values()):
+            if job.done or job.usage.sample() is None:
+                continue
+            self.signals.resources.emit(job.job_id, job.usage)
+
+
+class Sparkline(QtWidgets.QWidget):
+    """cpu % (green) and rss (blue, relative to its peak) of a job"""
+
+    def __init__(self, parent=None):
+        super(Sparkline, self).__init__(parent)
+        self.usage = None
+        self.setMinimumSize(120, 20)
+
+    def set_usage(self, usage):
+        self.usage = usage
+        self.update()
+
+    def _polyline(self, values, top):
+        w, h = self.width(), self.height() - 2
+        step = w / max(len(values) - 1, 1)
+        return QtGui.QPolygonF(
+            [
+                QtCore.QPointF(i * step, 1 + h - h * min(v / top, 1.0))
+                for i, v in enumerate(values)
+            ]
+        )
+
+    def paintEvent(self, event):
+        if self.usage is None or len(self.usage.cpu) < 2:
+            return
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        cpu, rss = list(self.usage.cpu), list(self.usage.rss)
+        painter.setPen(QtGui.QColor("#4caf50"))
+        painter.drawPolyline(self._polyline(cpu, max(100.0, max(cpu))))
+        painter.setPen(QtGui.QColor("#2196f3"))
+        painter.drawPolyline(self._polyline(rss, max(rss) or 1))
+
+
+class JobPanel(QtWidgets.QTreeWidget):
+    """one row per job with its progress bar, throughput and ETA"""
+
+    cancelRequested = QtCore.Signal(int)
+
+    def __init__(self, parent=None):
+        super(JobPanel, self).__init__(parent)
+        self.setWindowTitle("Jobs")
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.setRootIsDecorated(False)
+        self.setHeaderLabels(
+            ["job", "command", "status", "progress", "info", "", "resources"]
+        )
+        self.items = {}
+
+    @QtCore.Slot(int, object)
+    def add_job(self, job_id, argv):
+        item = QtWidgets.QTreeWidgetItem([str(job_id), " ".join(argv), "running"])
+        self.addTopLevelItem(item)
+        bar = QtWidgets.QProgressBar()
+        bar.setRange(0, 0)
+        bar.hide()
+        self.setItemWidget(item, 3, bar)
+        cancel = QtWidgets.QToolButton()
+        cancel.setText("cancel")
+        cancel.clicked.connect(lambda: self.cancelRequested.emit(job_id))
+        self.setItemWidget(item, 5, cancel)
+        self.setItemWidget(item, 6, Sparkline())
+        self.items[job_id] = item
+
+    @QtCore.Slot(int, object)
+    def update_progress(self, job_id, state):
+        item = self.items.get(job_id)
+        if item is None:
+            return
+        pos, length, label, elapsed = state
+        bar = self.itemWidget(item, 3)
+        bar.show()
+        if length:
+            # QProgressBar is int based
+            bar.setRange(0, 1000)
+            bar.setValue(int(1000 * min(pos, length) / length))
+        bar.setFormat(f"{label} %p%" if label else "%p%")
+        rate = pos / elapsed if elapsed > 0 else 0.0
+        info = f"{pos}/{length or '?'}  {rate:.1f}/s"
+        if length and rate > 0:
+            info += f"  ETA {_format_seconds((length - pos) / rate)}"
+        item.setText(4, info)
+        self.show()
+
+    @QtCore.Slot(int, object)
+    def update_stages(self, job_id, stats):
+        item = self.items.get(job_id)
+        if item is None:
+            return
+        item.setText(
+            4,
+            "  |  ".join(
+                f"{name}: {n} ({n / elapsed if elapsed > 0 else 0.0:.1f}/s)"
+                for name, n, elapsed in stats
+            ),
+        )
+        self.show()
+
+    @QtCore.Slot(int, object)
+    def update_resources(self, job_id, usage):
+        item = self.items.get(job_id)
+        if item is None:
+            return
+        spark = self.itemWidget(item, 6)
+        spark.set_usage(usage)
+        spark.setToolTip(usage.summary_text())
+
+    @QtCore.Slot(int, bool)
+    def finish_job(self, job_id, ok):
+        item = self.items.get(job_id)
+        if item is not None:
+            item.setText(2, "done" if ok else "failed")
+            self.removeItemWidget(item, 5)
+
+
+class GLogHandler(logging.Handler):
+    """collect log records from any thread for a `LogPanel`
+
+    `emit` only appends a plain tuple to a deque; the panel drains it in
+    batches on the GUI thread.
+    """
+
+    def __init__(self, level=logging.NOTSET):
+        super(GLogHandler, self).__init__(level)
+        self.pending = collections.deque()
+
+    def emit(self, record):
+        try:
+            msg = record.getMessage()
+            if record.exc_info:
+                msg += "\n" + "".join(traceback.format_exception(*record.exc_info))
+            job = _current_job.get()
+            self.pending.append(
+                (
+                    record.created,
+                    record.levelno,
+                    record.levelname,
+                    record.name,
+                    None if job is None else job.job_id,
+                    msg,
+                )
+            )
+        except Exception:
+            self.handleError(record)
+
+    def drain(self):
+        rows = []
+        pending = self.pending
+        while pending:
+            rows.append(pending.popleft())
+        return rows
+
+
+class LogModel(QtCore.QAbstractTableModel):
+    headers = ["time", "level", "logger", "job", "message"]
+
+    def __init__(self, max_rows=100000, parent=None):
+        super(LogModel, self).__init__(parent)
+        self.max_rows = max_rows
+        self.rows = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if (
+            role == QtCore.Qt.ItemDataRole.DisplayRole
+            and orientation == QtCore.Qt.Orientation.Horizontal
+        ):
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        created, _, levelname, name, job_id, msg = self.rows[index.row()]
+        col = index.column()
+        if col == 0:
+            stamp = time.strftime("%H:%M:%S", time.localtime(created))
+            return f"{stamp}.{int(created % 1 * 1000):03d}"
+        if col == 3:
+            return "" if job_id is None else str(job_id)
+        return (None, levelname, name, None, msg)[col]
+
+    def add_rows(self, rows):
+        if not rows:
+            return
+        rows = rows[-self.max_rows :]
+        excess = len(self.rows) + len(rows) - self.max_rows
+        if excess > 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), 0, excess - 1)
+            del self.rows[:excess]
+            self.endRemoveRows()
+        n = len(self.rows)
+        self.beginInsertRows(QtCore.QModelIndex(), n, n + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+
+class LogFilterModel(QtCore.QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super(LogFilterModel, self).__init__(parent)
+        self.min_level = logging.NOTSET
+        self.logger = ""
+
+    def set_min_level(self, level):
+        self.min_level = level
+        self.invalidateFilter()
+
+    def set_logger(self, text):
+        self.logger = text
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, row, parent):
+        _, levelno, _, name, _, _ = self.sourceModel().rows[row]
+        return levelno >= self.min_level and name.startswith(self.logger)
+
+
+class LogPanel(QtWidgets.QWidget):
+    """table of the log records emitted while the GUI runs
+
+    Records are moved from the handler to the model every `interval` ms and
+    only the newest `max_rows` are kept.
+    """
+
+    interval = 200
+    levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+    def __init__(self, max_rows=100000, parent=None):
+        super(LogPanel, self).__init__(parent)
+        self.setWindowTitle("Log")
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.handler = GLogHandler()
+        self.model = LogModel(max_rows, self)
+        self.proxy = LogFilterModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.level = QtWidgets.QComboBox()
+        self.level.addItems(self.levels)
+        self.level.currentTextChanged.connect(
+            lambda name: self.proxy.set_min_level(logging.getLevelName(name))
+        )
+        self.logger = QtWidgets.QLineEdit()
+        self.logger.setPlaceholderText("logger")
+        self.logger.textChanged.connect(self.proxy.set_logger)
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.proxy)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setStretchLastSection(True)
+        self.view.setWordWrap(False)
+        filters = QtWidgets.QHBoxLayout()
+        filters.addWidget(self.level)
+        filters.addWidget(self.logger)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(filters)
+        layout.addWidget(self.view)
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(self.interval)
+
+    @QtCore.Slot()
+    def flush(self):
+        rows = self.handler.drain()
+        if not rows:
+            return
+        bar = self.view.verticalScrollBar()
+        at_end = bar.value() == bar.maximum()
+        self.model.add_rows(rows)
+        if at_end:
+            self.view.scrollToBottom()
+        self.show()
+
+
+_RESULT_CELL_CHARS = 200
+_RESULT_TIP_CHARS = 4000
+
+
+def _result_text(value, limit=_RESULT_CELL_CHARS):
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= limit else text[: limit - 1] + "\u2026"
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, bytes, bytearray)) or not hasattr(value, "__iter__")
+
+
+def _sort_key(value):
+    # numbers before text before anything else, None and nan last
+    if value is None:
+        return (3, 0)
+    if isinstance(value, (int, float)):
+        return (3, 0) if value != value else (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (2, repr(value))
+
+
+class ResultTable(object):
+    """the rows and columns of a value returned by a command
+
+    A mapping is shown as key and value columns, rows that are mappings,
+    named tuples, dataclasses or sequences get a column per key, field or
+    position seen in the first `probe` rows, other rows one column. Indexable
+    values are used in place. Other iterables are only ever read by a thread
+    of their own, as many rows as `more` asks for or all of them for
+    `fetch_all`; `fetched` is called from that thread after each batch.
+    """
+
+    probe = 100
+    batch = 10000
+
+    def __init__(self, value, fetched=None):
+        self.value = value
+        self.fetched = fetched
+        self.lock = threading.Lock()
+        self._more = threading.Condition(self.lock)
+        self.order = None
+        self.error = None
+        self.exhausted = True
+        self.closed = False
+        if isinstance(value, collections.abc.Mapping):
+            self.rows = list(value.items())
+        elif _is_scalar(value):
+            self.rows = [value]
+        elif (
+            hasattr(value, "__len__")
+            and hasattr(value, "__getitem__")
+            and not hasattr(value, "itertuples")
+        ):
+            self.rows = value
+        else:
+            self.rows = []
+            self.exhausted = False
+            self._wanted = self.probe
+            # the columns are probed once the first rows are read
+            self.columns = [("value", "self", None)]
+            threading.Thread(
+                target=self._read, name="quick-result", daemon=True
+            ).start()
+            return
+        self.columns = self._columns(value)
+
+    def _columns(self, value):
+        if isinstance(value, collections.abc.Mapping):
+            return [("key", "index", 0), ("value", "index", 1)]
+        if _is_scalar(value):
+            return [("value", "self", None)]
+        first = [self.rows[i] for i in range(min(len(self.rows), self.probe))]
+        if first and all(isinstance(r, collections.abc.Mapping) for r in first):
+            keys = dict.fromkeys(k for r in first for k in r)
+            return [(str(k), "key", k) for k in keys]
+        if first and hasattr(first[0], "_fields"):
+            return [(f, "index", i) for i, f in enumerate(first[0]._fields)]
+        if first and dataclasses.is_dataclass(first[0]):
+            return [(f.name, "attr", f.name) for f in dataclasses.fields(first[0])]
+        if first and not any(_is_scalar(r) for r in first):
+            width = max(len(r) if hasattr(r, "__len__") else 1 for r in first)
+            return [(str(i), "index", i) for i in range(width)]
+        return [("value", "self", None)]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _read(self):
+        # a pandas DataFrame indexes its columns, read its rows instead
+        rows = getattr(self.value, "itertuples", None)
+        items = iter(self.value) if rows is None else rows(index=False)
+        while True:
+            with self._more:
+                while not self.closed and len(self.rows) >= self._wanted:
+                    self._more.wait()
+                if self.closed:
+                    break
+                n = min(self._wanted - len(self.rows), self.batch)
+            try:
+                rows = list(itertools.islice(items, n))
+            except Exception as e:
+                rows, self.error = [], e
+            with self._more:
+                probed = not self.rows
+                self.rows.extend(rows)
+                if probed:
+                    self.columns = self._columns(self.value)
+                if len(rows) < n:
+                    self.exhausted = True
+                self._more.notify_all()
+            if self.fetched is not None:
+                self.fetched()
+            if self.exhausted:
+                return
+        getattr(items, "close", lambda: None)()
+
+    def more(self, n):
+        """have at least `n` rows read, without waiting for them"""
+        with self._more:
+            if not self.exhausted and n > self._wanted:
+                self._wanted = n
+                self._more.notify_all()
+
+    def fetch_all(self, stop=None):
+        """wait for every row to be read, False when stopped or closed"""
+        self.more(float("inf"))
+        with self._more:
+            while not (self.exhausted or self.closed):
+                if stop is not None and stop():
+                    return False
+                self._more.wait(0.1)
+            return not self.closed
+
+    def close(self):
+        """stop reading, the rows read so far stay"""
+        with self._more:
+            if not self.exhausted:
+                self.closed = True
+                self.exhausted = True
+                self._more.notify_all()
+
+    def source_row(self, row):
+        return row if self.order is None else self.order[row]
+
+    def row(self, row):
+        return self.rows[self.source_row(row)]
+
+    def cell(self, row, col):
+        return self._cell(self.row(row), col)
+
+    def _cell(self, item, col):
+        _, how, key = self.columns[col]
+        try:
+            if how == "key":
+                return item.get(key)
+            if how == "index":
+                return item[key]
+            if how == "attr":
+                return getattr(item, key)
+            return item
+        except (AttributeError, IndexError, KeyError, TypeError):
+            return None
+
+    def _column(self, col, start, stop):
+        """the cells of column `col` in rows `start` to `stop`"""
+        rows = self.rows
+        _, how, key = self.columns[col]
+        try:
+            if how == "key":
+                return [rows[i].get(key) for i in range(start, stop)]
+            if how == "index":
+                return [rows[i][key] for i in range(start, stop)]
+            if how == "attr":
+                return [getattr(rows[i], key) for i in range(start, stop)]
+            return [rows[i] for i in range(start, stop)]
+        except (AttributeError, IndexError, KeyError, TypeError):
+            # ragged rows
+            return [self._cell(rows[i], col) for i in range(start, stop)]
+
+    def sort_order(self, col, descending=False, chunk=1 << 16, stop=None):
+        """row order sorted by column `col`, None when stopped
+
+        The cells are read `chunk` rows at a time between checks of `stop`.
+        Columns of only numbers or only text are sorted by their values.
+        """
+        if not self.fetch_all(stop=stop):
+            return None
+        n = len(self.rows)
+        keys = []
+        for start in range(0, n, chunk):
+            if stop is not None and stop():
+                return None
+            keys.extend(self._column(col, start, min(start + chunk, n)))
+        kinds = set(map(type, keys))
+        numbers = kinds <= {int, float} and all(k == k for k in keys)
+        if not (numbers or kinds == {str}):
+            keys = [_sort_key(k) for k in keys]
+        return sorted(range(n), key=keys.__getitem__, reverse=descending)
+
+    def export(self, path, progress=None):
+        """write the rows in their current order to a .json or .csv file,
+        calling `progress` with the number of rows written now and then"""
+        self.fetch_all()
+        order = self.order
+        rows = self.rows if order is None else (self.rows[i] for i in order)
+        labels = [label for label, _, _ in self.columns]
+        cols = range(len(self.columns))
+        as_json = path.endswith(".json")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            if as_json:
+                f.write("[")
+            else:
+                writer = csv.writer(f)
+                writer.writerow(labels)
+            for n, item in enumerate(rows):
+                values = [self._cell(item, col) for col in cols]
+                if as_json:
+                    record = json.dumps(dict(zip(labels, values)), default=str)
+                    f.write(("\n" if n == 0 else ",\n") + record)
+                else:
+                    writer.writerow(values)
+                if progress is not None and n % 10000 == 9999:
+                    progress(n + 1)
+            if as_json:
+                f.write("\n]\n")
+
+
+class _ResultSignals(QtCore.QObject):
+    fetched = QtCore.Signal()
+    sorted = QtCore.Signal(int, object)
+    progress = QtCore.Signal(int)
+    exported = QtCore.Signal(str, str)
+
+
+class _SortRunnable(QtCore.QRunnable):
+    def __init__(self, model, serial, col, descending):
+        super(_SortRunnable, self).__init__()
+        self.model = model
+        self.table = model.table
+        self.signals = model.signals
+        self.serial = serial
+        self.col = col
+        self.descending = descending
+
+    @QtCore.Slot()
+    def run(self):
+        order = self.table.sort_order(
+            self.col, self.descending, stop=lambda: self.model.serial != self.serial
+        )
+        if order is not None:
+            self.signals.sorted.emit(self.serial, order)
+
+
+class _ExportRunnable(QtCore.QRunnable):
+    def __init__(self, table, signals, path):
+        super(_ExportRunnable, self).__init__()
+        self.table = table
+        self.signals = signals
+        self.path = path
+
+    @QtCore.Slot()
+    def run(self):
+        error = ""
+        try:
+            self.table.export(self.path, self.signals.progress.emit)
+        except Exception as e:
+            error = repr(e)
+        self.signals.exported.emit(self.path, error)
+
+
+class ResultModel(QtCore.QAbstractTableModel):
+    """a `ResultTable` handed to views in `batch` sized chunks
+
+    Only the cells a view shows are turned into text. The rows of an
+    iterable are added as its reading thread sends `fetched`. Sorting runs
+    on a worker thread and a newer sort stops the older one.
+    """
+
+    batch = 1000
+
+    def __init__(self, value, parent=None):
+        super(ResultModel, self).__init__(parent)
+        self.signals = _ResultSignals()
+        self.signals.sorted.connect(self.set_order)
+        self.signals.fetched.connect(self.add_rows)
+        self.table = ResultTable(value, self.signals.fetched.emit)
+        self.columns = self.table.columns
+        self._target = self.batch
+        self._loaded = min(len(self.table), self._target)
+        self.serial = 0
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if role != QtCore.Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Orientation.Horizontal:
+            return self.table.columns[section][0]
+        return str(self.table.source_row(section))
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return _result_text(self.table.cell(index.row(), index.column()))
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole:
+            value = self.table.cell(index.row(), index.column())
+            return _result_text(value, _RESULT_TIP_CHARS)
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole:
+            value = self.table.cell(index.row(), index.column())
+            if isinstance(value, (int, float)):
+                return int(
+                    QtCore.Qt.AlignmentFlag.AlignRight
+                    | QtCore.Qt.AlignmentFlag.AlignVCenter
+                )
+        return None
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and (
+            self._loaded < len(self.table) or not self.table.exhausted
+        )
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        self._target = self._loaded + self.batch
+        self.table.more(self._target)
+        self.add_rows()
+
+    @QtCore.Slot()
+    def add_rows(self):
+        if self.columns is not self.table.columns:
+            # probed from the first rows read, none of them shown yet
+            self.beginResetModel()
+            self.columns = self.table.columns
+            self.endResetModel()
+        n = min(self._target, len(self.table)) - self._loaded
+        if n <= 0:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._loaded, self._loaded + n - 1)
+        self._loaded += n
+        self.endInsertRows()
+
+    def sort(self, column, order=QtCore.Qt.SortOrder.AscendingOrder):
+        self.serial += 1
+        if column < 0:
+            self.set_order(self.serial, None)
+            return
+        descending = order == QtCore.Qt.SortOrder.DescendingOrder
+        QtCore.QThreadPool.globalInstance().start(
+            _SortRunnable(self, self.serial, column, descending)
+        )
+
+    @QtCore.Slot(int, object)
+    def set_order(self, serial, order):
+        if serial != self.serial:
+            return
+        self.beginResetModel()
+        self.table.order = order
+        self._target = max(self._loaded, self.batch)
+        self._loaded = min(len(self.table), self._target)
+        self.endResetModel()
+
+    def export(self, path):
+        """write the rows to `path` on a worker thread, see `exported`"""
+        QtCore.QThreadPool.globalInstance().start(
+            _ExportRunnable(self.table, self.signals, path)
+        )
+
+
+class ResultView(QtWidgets.QWidget):
+    """table of one returned value, cells holding containers open in a tab"""
+
+    def __init__(self, value, open_value, title="", parent=None):
+        super(ResultView, self).__init__(parent)
+        self.title = title
+        self.open_value = open_value
+        self.model = ResultModel(value, self)
+        self.model.signals.progress.connect(
+            lambda n: self.status.setText(f"exported {n} rows")
+        )
+        self.model.signals.exported.connect(self.exported)
+        self.model.rowsInserted.connect(self.update_status)
+        self.model.signals.fetched.connect(self.update_status)
+        self.model.modelReset.connect(self.update_status)
+        self.status = QtWidgets.QLabel()
+        export = QtWidgets.QPushButton("Export")
+        export.clicked.connect(self.ask_export)
+        self.view = QtWidgets.QTableView()
+        self.view.setModel(self.model)
+        self.view.setWordWrap(False)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        # enabling sorting sorts by the indicator, keep the returned order
+        self.view.horizontalHeader().setSortIndicator(
+            -1, QtCore.Qt.SortOrder.AscendingOrder
+        )
+        self.view.setSortingEnabled(True)
+        self.view.doubleClicked.connect(self.open_cell)
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(self.status, 1)
+        bar.addWidget(export)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(bar)
+        layout.addWidget(self.view)
+        self.update_status()
+
+    @QtCore.Slot()
+    def update_status(self):
+        table = self.model.table
+        rows = f"{len(table)}{'' if table.exhausted else '+'} rows"
+        status = f"{rows}, {len(self.model.columns)} columns"
+        if table.error is not None:
+            status += f", reading stopped by {table.error!r}"
+        self.status.setText(status)
+
+    @QtCore.Slot()
+    def ask_export(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export", "", "CSV (*.csv);;JSON (*.json)"
+        )
+        if path:
+            self.status.setText("exporting")
+            self.model.export(path)
+
+    @QtCore.Slot(str, str)
+    def exported(self, path, error):
+        self.status.setText(f"failed: {error}" if error else f"exported {path}")
+
+    def open_cell(self, index):
+        table = self.model.table
+        value = table.cell(index.row(), index.column())
+        if not _is_scalar(value):
+            row = table.source_row(index.row())
+            label = table.columns[index.column()][0]
+            self.open_value(f"{self.title}[{row}].{label}", value)
+
+
+class ResultPanel(QtWidgets.QWidget):
+    """the values returned by the last `max_tabs` jobs, one tab each"""
+
+    max_tabs = 20
+
+    def __init__(self, parent=None):
+        super(ResultPanel, self).__init__(parent)
+        self.setWindowTitle("Results")
+        self.tabs = QtWidgets.QTabWidget()
+        self.tabs.setTabsClosable(True)
+        self.tabs.tabCloseRequested.connect(self.close_tab)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.tabs)
+
+    @QtCore.Slot(int, object)
+    def add_result(self, job_id, value):
+        self.show_value(f"job {job_id}", value)
+
+    def show_value(self, title, value):
+        view = ResultView(value, self.show_value, title)
+        self.tabs.addTab(view, title)
+        self.tabs.setCurrentWidget(view)
+        while self.tabs.count() > self.max_tabs:
+            self.close_tab(0)
+        self.show()
+        return view
+
+    @QtCore.Slot(int)
+    def close_tab(self, index):
+        view = self.tabs.widget(index)
+        self.tabs.removeTab(index)
+        view.model.table.close()
+        view.deleteLater()
+
+
+class GCommand(click.Command):
+    def __init__(self, new_thread=True, *arg, **args):
+        super(GCommand, self).__init__(*arg, **args)
+        self.new_thread = new_thread
+
+
+class GOption(click.Option):
+    def __init__(self, *arg, show_name=_missing, **args):
+        super(GOption, self).__init__(*arg, **args)
+        self.show_name = show_name
+
+
+class GuiStream(QtCore.QObject):
+    textWritten = QtCore.Signal(str)
+
+    def flush(self):
+        pass
+
+    def write(self, text):
+        if isinstance(text, bytes):
+            # behave like a text stream, click probes streams with b""
+            raise TypeError("write() argument must be str, not bytes")
+        if text:
+            self.textWritten.emit(str(text))
+            _tee(text)
+
+
+class _TeeStream(object):
+    """wrap a terminal stream, teeing what jobs write like `GuiStream`"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        n = self.stream.write(text)
+        if text and isinstance(text, str):
+            _tee(text)
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _tee(text):
+    job = _current_job.get()
+    if job is not None and job.tee is not None:
+        job.tee.write(job.job_id, text)
+
+
+# CSI (SGR and the others, which are dropped), OSC and two byte escapes
+_ANSI_ESCAPE = re.compile(
+    r"\x1b(?:\[([0-?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])"
+)
+# what an escape split at the end of a write may start with
+_ANSI_PREFIX = re.compile(r"\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?)?\Z")
+_ANSI_MAX_PENDING = 256
+_ANSI_RESET = (None, None, False, False, False, False)
+# (state, SGR parameters) -> state, a program only uses a few
+_sgr_cache = {}
+_SGR_CACHE_SIZE = 4096
+# xterm colors 0-15
+_ANSI_COLORS = [
+    (0, 0, 0),
+    (205, 0, 0),
+    (0, 205, 0),
+    (205, 205, 0),
+    (0, 0, 238),
+    (205, 0, 205),
+    (0, 205, 205),
+    (229, 229, 229),
+    (127, 127, 127),
+    (255, 0, 0),
+    (0, 255, 0),
+    (255, 255, 0),
+    (92, 92, 255),
+    (255, 0, 255),
+    (0, 255, 255),
+    (255, 255, 255),
+]
+
+
+class AnsiParser(object):
+    """split text with ANSI escapes into ``(text, state)`` spans
+
+    `state` is a hashable ``(fg, bg, bold, italic, underline, inverse)``
+    tuple, None for unstyled text; colors are a 0-255 index or an ``(r, g,
+    b)`` tuple. An escape cut by the end of a write is kept until the next
+    one, escapes other than SGR are dropped.
+    """
+
+    def __init__(self):
+        self.state = None
+        self.pending = ""
+
+    def feed(self, text):
+        if self.pending:
+            text = self.pending + text
+            self.pending = ""
+        if "\x1b" not in text:
+            return [(text, self.state)] if text else []
+        spans = []
+        pos = 0
+        for match in _ANSI_ESCAPE.finditer(text):
+            if match.start() > pos:
+                spans.append((text[pos : match.start()], self.state))
+            pos = match.end()
+            if match.group(2) == "m":
+                key = (self.state, match.group(1))
+                state = _sgr_cache.get(key, _missing)
+                if state is _missing:
+                    if len(_sgr_cache) >= _SGR_CACHE_SIZE:
+                        _sgr_cache.clear()
+                    state = _sgr_cache[key] = self.sgr(*key)
+                self.state = state
+        rest = text[pos:]
+        esc = rest.rfind("\x1b")
+        if (
+            esc >= 0
+            and len(rest) - esc < _ANSI_MAX_PENDING
+            and _ANSI_PREFIX.match(rest, esc)
+        ):
+            self.pending = rest[esc:]
+            rest = rest[:esc]
+        rest = rest.replace("\x1b", "")
+        if rest:
+            spans.append((rest, self.state))
+        return [span for span in spans if span[0]]
+
+    @staticmethod
+    def sgr(state, params):
+        fg, bg, bold, italic, underline, inverse = state or _ANSI_RESET
+        codes = [int(c) if c.isdigit() else 0 for c in params.split(";")]
+        i = 0
+        while i < len(codes):
+            c = codes[i]
+            if c == 0:
+                fg = bg = None
+                bold = italic = underline = inverse = False
+            elif c == 1:
+                bold = True
+            elif c == 3:
+                italic = True
+            elif c == 4:
+                underline = True
+            elif c == 7:
+                inverse = True
+            elif c == 22:
+                bold = False
+            elif c == 23:
+                italic = False
+            elif c == 24:
+                underline = False
+            elif c == 27:
+                inverse = False
+            elif 30 <= c <= 37 or 90 <= c <= 97:
+                fg = c - 30 if c < 90 else c - 82
+            elif 40 <= c <= 47 or 100 <= c <= 107:
+                bg = c - 40 if c < 100 else c - 92
+            elif c == 39:
+                fg = None
+            elif c == 49:
+                bg = None
+            elif c in (38, 48):
+                color = None
+                if codes[i + 1 : i + 2] == [5] and i + 2 < len(codes):
+                    color = codes[i + 2] & 255
+                    i += 2
+                elif codes[i + 1 : i + 2] == [2] and i + 4 < len(codes):
+                    color = tuple(v & 255 for v in codes[i + 2 : i + 5])
+                    i += 4
+                if c == 38:
+                    fg = color
+                else:
+                    bg = color
+            i += 1
+        state = (fg, bg, bold, italic, underline, inverse)
+        return None if state == _ANSI_RESET else state
+
+
+def _ansi_color(color):
+    if isinstance(color, tuple):
+        return QtGui.QColor(*color)
+    if color < 16:
+        return QtGui.QColor(*_ANSI_COLORS[color])
+    if color < 232:
+        r, g, b = (color - 16) // 36, (color - 16) // 6 % 6, (color - 16) % 6
+        return QtGui.QColor(*(0 if v == 0 else 55 + 40 * v for v in (r, g, b)))
+    return QtGui.QColor(*(8 + 10 * (color - 232),) * 3)
+
+
+_ansi_formats = {}
+
+
+def ansi_format(state):
+    """the shared QTextCharFormat of an `AnsiParser` state"""
+    fmt = _ansi_formats.get(state)
+    if fmt is not None:
+        return fmt
+    fmt = QtGui.QTextCharFormat()
+    if state is not None:
+        fg, bg, bold, italic, underline, inverse = state
+        if inverse:
+            palette = QtWidgets.QApplication.palette()
+            fg, bg = bg, fg
+            fg = palette.base().color() if fg is None else _ansi_color(fg)
+            bg = palette.text().color() if bg is None else _ansi_color(bg)
+        else:
+            fg = None if fg is None else _ansi_color(fg)
+            bg = None if bg is None else _ansi_color(bg)
+        if fg is not None:
+            fmt.setForeground(fg)
+        if bg is not None:
+            fmt.setBackground(bg)
+        if bold:
+            fmt.setFontWeight(QtGui.QFont.Weight.Bold)
+        fmt.setFontItalic(italic)
+        fmt.setFontUnderline(underline)
+    _ansi_formats[state] = fmt
+    return fmt
+
+
+class OutputEdit(QtWidgets.QTextEdit):
+    """read only view of the job output rendering ANSI colors
+
+    Writes are parsed right away but inserted every `interval` ms, runs of
+    text in the same format as one insert.
+    """
+
+    interval = 50
+
+    def __init__(self, parent=None):
+        super(OutputEdit, self).__init__(parent)
+        self.setUndoRedoEnabled(False)
+        self.ansi = AnsiParser()
+        self._pending = []
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.interval)
+        self._timer.timeout.connect(self.flush)
+
+    def print(self, text):
+        self.write_spans(self.ansi.feed(text))
+
+    def write_spans(self, spans):
+        """queue the `AnsiParser` spans of a write"""
+        pending = self._pending
+        for text, state in spans:
+            if pending and pending[-1][0] == state:
+                pending[-1][1].append(text)
+            else:
+                pending.append((state, [text]))
+        if pending and not self._timer.isActive():
+            self._timer.start()
+
+    @QtCore.Slot()
+    def flush(self):
+        self._timer.stop()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        # only follow the output while scrolled to its end, so jumping to a
+        # search hit is not undone by the next line of a running job
+        bar = self.verticalScrollBar()
+        at_end = bar.value() == bar.maximum()
+        cursor = QtGui.QTextCursor(self.document())
+        cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for state, texts in pending:
+            # an explicit format, the end of the document carries the last one
+            cursor.insertText("".join(texts), ansi_format(state))
+        cursor.endEditBlock()
+        if at_end:
+            bar.setValue(bar.maximum())
+
+    def goto_line(self, line):
+        self.flush()
+        block = self.document().findBlockByNumber(line)
+        if not block.isValid():
+            return
+        cursor = QtGui.QTextCursor(block)
+        cursor.movePosition(
+            QtGui.QTextCursor.MoveOperation.EndOfBlock,
+            QtGui.QTextCursor.MoveMode.KeepAnchor,
+        )
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+
+
+class _OutputChunk(object):
+    __slots__ = ("first", "count", "lines", "data", "size")
+
+    def __init__(self, first):
+        self.first = first
+        self.count = 0
+        self.lines = []
+        self.data = None
+        self.size = 0
+
+
+class OutputBuffer(object):
+    """every line written to the output, the older ones compressed
+
+    Lines are kept in chunks of `chunk_lines`. Once the chunks hold more than
+    `max_memory` characters of text, the oldest full chunks are compressed
+    with zlib. `append` runs in the GUI thread, searches read the buffer
+    from a worker thread.
+    """
+
+    chunk_lines = 4096
+
+    def __init__(self, max_memory=16 << 20, level=1):
+        self.max_memory = max_memory
+        self.level = level
+        self.lock = threading.Lock()
+        self.chunks = []
+        self._firsts = []
+        self._hot = 0  # first chunk not compressed yet
+        self.lines = 0  # complete lines
+        self.memory = 0
+        self.partial = ""
+
+    def append(self, text):
+        lines = (self.partial + text).split("\n")
+        with self.lock:
+            self.partial = lines.pop()
+            for line in lines:
+                if not self.chunks or len(self.chunks[-1].lines) >= self.chunk_lines:
+                    self.chunks.append(_OutputChunk(self.lines))
+                    self._firsts.append(self.lines)
+                chunk = self.chunks[-1]
+                chunk.lines.append(line)
+                chunk.count += 1
+                chunk.size += len(line)
+                self.lines += 1
+                self.memory += len(line)
+            while self.memory > self.max_memory and self._hot < len(self.chunks) - 1:
+                chunk = self.chunks[self._hot]
+                text = "\n".join(chunk.lines)
+                chunk.data = zlib.compress(text.encode("utf-8", "replace"), self.level)
+                chunk.lines = None
+                self.memory -= chunk.size
+                self._hot += 1
+
+    def texts(self, start=0):
+        """``(first line, line count, text)`` of the complete lines from
+        `start` on, one chunk at a time"""
+        with self.lock:
+            i = max(bisect_right(self._firsts, start) - 1, 0)
+            chunks = [(c.first, c.count, c.lines, c.data) for c in self.chunks[i:]]
+            if chunks:
+                # the only chunk still growing
+                first, count, lines, data = chunks[-1]
+                chunks[-1] = (first, count, lines[:], data)
+        for first, count, lines, data in chunks:
+            if start >= first + count:
+                continue
+            if lines is None:
+                text = zlib.decompress(data).decode("utf-8", "replace")
+                if start <= first:
+                    yield first, count, text
+                    continue
+                lines = text.split("\n")
+            lines = lines[max(start - first, 0) :]
+            yield max(start, first), len(lines), "\n".join(lines)
+
+    def tail(self):
+        """the line being written, not ended by a newline yet"""
+        with self.lock:
+            return self.lines, self.partial
+
+
+class _SearchRunnable(QtCore.QRunnable):
+    def __init__(self, search, serial, key, pattern):
+        super(_SearchRunnable, self).__init__()
+        self.search = search
+        self.serial = serial
+        self.key = key
+        self.pattern = pattern
+
+    def stale(self):
+        return self.search.serial != self.serial
+
+    def emit(self, hits):
+        if hits:
+            self.search.found.emit(self.serial, hits)
+
+    @QtCore.Slot()
+    def run(self):
+        search = self.search
+        batch = search.batch
+        # the worker pool has a single thread, only it touches `results`
+        results = search.results
+        entry = results.pop(self.key, None) or [0, []]
+        results[self.key] = entry
+        while len(results) > search.max_queries:
+            results.pop(next(iter(results)))
+        hits = entry[1]
+        for i in range(0, len(hits), batch):
+            if self.stale():
+                return
+            self.emit(hits[i : i + batch])
+        searcher = self.pattern.search
+        new = []
+        for first, count, text in search.buffer.texts(entry[0]):
+            if self.stale() or len(hits) >= search.max_hits:
+                break
+            line, pos, match = first, 0, searcher(text)
+            while match is not None and len(hits) < search.max_hits:
+                start = text.rfind("\n", 0, match.start()) + 1
+                line += text.count("\n", pos, start)
+                end = text.find("\n", match.start())
+                end = len(text) if end < 0 else end
+                hits.append((line, text[start:end]))
+                new.append(hits[-1])
+                if len(new) >= batch:
+                    self.emit(new)
+                    new = []
+                pos = end
+                match = searcher(text, end + 1) if end < len(text) else None
+            # a chunk is scanned to its end or not at all
+            entry[0] = first + count
+        self.emit(new)
+        if self.stale():
+            return
+        lines, partial = search.buffer.tail()
+        found = len(hits)
+        if lines == entry[0] and found < search.max_hits and searcher(partial):
+            self.emit([(lines, partial)])
+            found += 1
+        search.done.emit(self.serial, found)
+
+
+class OutputSearch(QtCore.QObject):
+    """regex or substring search over an `OutputBuffer` on a worker thread
+
+    The hits are sent to `found` in batches. The hits of the complete lines
+    are remembered for the last `max_queries` queries, so searching again
+    while the output grows only scans the new lines. A new search makes the
+    running one stop; it stops by itself after `max_hits` hits.
+    """
+
+    found = QtCore.Signal(int, object)
+    done = QtCore.Signal(int, int)
+    batch = 256
+    max_hits = 10000
+    max_queries = 16
+
+    def __init__(self, buffer, parent=None):
+        super(OutputSearch, self).__init__(parent)
+        self.buffer = buffer
+        self.results = collections.OrderedDict()
+        self.serial = 0
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+    def search(self, query, regex=False, case=False):
+        """start searching `query`, return the serial its hits are sent
+        with; raises `re.error` for an invalid regex"""
+        flags = re.MULTILINE if case else re.MULTILINE | re.IGNORECASE
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        self.serial += 1
+        self.pool.start(
+            _SearchRunnable(self, self.serial, (query, regex, case), pattern)
+        )
+        return self.serial
+
+    def cancel(self):
+        self.serial += 1
+
+
+_NEWLINES = re.compile("\r\n?|\u2029")
+
+
+class OutputPanel(QtWidgets.QWidget):
+    """the job output with a search bar and a list of the hits"""
+
+    delay = 200
+
+    def __init__(self, parent=None):
+        super(OutputPanel, self).__init__(parent)
+        self.setWindowTitle("Output")
+        self.buffer = OutputBuffer()
+        self.searcher = OutputSearch(self.buffer, self)
+        self.searcher.found.connect(self.add_hits)
+        self.searcher.done.connect(self.finish_search)
+        self.serial = None
+        self._cr = False  # the last write ended with "\r"
+        self.edit = OutputEdit()
+        self.edit.setReadOnly(True)
+        self.query = _InputLineEdit()
+        self.query.setPlaceholderText("search output")
+        self.query.setClearButtonEnabled(True)
+        self.regex = QtWidgets.QCheckBox("regex")
+        self.case = QtWidgets.QCheckBox("case")
+        self.status = QtWidgets.QLabel()
+        self.hits = QtWidgets.QListWidget()
+        self.hits.setUniformItemSizes(True)
+        self.hits.hide()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.delay)
+        self._timer.timeout.connect(self.search)
+        self.query.textChanged.connect(self._timer.start)
+        # searching again picks up the output written since
+        self.query.returnPressed.connect(self.search)
+        self.regex.toggled.connect(self._timer.start)
+        self.case.toggled.connect(self._timer.start)
+        self.hits.itemActivated.connect(self.goto_item)
+        self.hits.itemClicked.connect(self.goto_item)
+        bar = QtWidgets.QHBoxLayout()
+        bar.addWidget(self.query)
+        bar.addWidget(self.regex)
+        bar.addWidget(self.case)
+        bar.addWidget(self.status)
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Orientation.Vertical)
+        splitter.addWidget(self.edit)
+        splitter.addWidget(self.hits)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addLayout(bar)
+        layout.addWidget(splitter)
+
+    @QtCore.Slot(str)
+    def print(self, text):
+        spans = [(self._newlines(t), fmt) for t, fmt in self.edit.ansi.feed(text)]
+        # searched and jumped to without the escapes
+        self.buffer.append("".join(text for text, _ in spans))
+        self.edit.write_spans(spans)
+
+    def _newlines(self, text):
+        # the editor starts a block at "\r" and "\r\n" as well, the lines of
+        # the buffer must match its blocks for `goto_line`
+        if self._cr and text[:1] == "\n":
+            text = text[1:]
+            self._cr = False
+        if text:
+            self._cr = text[-1] == "\r"
+        return _NEWLINES.sub("\n", text)
+
+    @QtCore.Slot()
+    def search(self):
+        self._timer.stop()
+        self.hits.clear()
+        query = self.query.text()
+        if not query:
+            self.searcher.cancel()
+            self.serial = None
+            self.status.clear()
+            self.hits.hide()
+            return
+        try:
+            self.serial = self.searcher.search(
+                query, self.regex.isChecked(), self.case.isChecked()
+            )
+        except re.error as e:
+            self.searcher.cancel()
+            self.serial = None
+            self.status.setText(str(e))
+            return
+        self.status.setText("searching")
+        self.hits.show()
+
+    @QtCore.Slot(int, object)
+    def add_hits(self, serial, hits):
+        if serial != self.serial:
+            return
+        for line, text in hits:
+            item = QtWidgets.QListWidgetItem(f"{line + 1}: {text}")
+            item.setData(_GTypeRole, line)
+            self.hits.addItem(item)
+
+    @QtCore.Slot(int, int)
+    def finish_search(self, serial, found):
+        if serial != self.serial:
+            return
+        full = found >= self.searcher.max_hits
+        self.status.setText(f"{found}{'+' if full else ''} hits")
+
+    def goto_item(self, item):
+        self.edit.goto_line(item.data(_GTypeRole))
+
+
+class _ZlibFile(object):
+    """a file written as one zlib stream"""
+
+    def __init__(self, path, level):
+        self.raw = open(path, "wb")
+        self.stream = zlib.compressobj(level)
+
+    def write(self, data):
+        self.raw.write(self.stream.compress(data))
+
+    def flush(self):
+        self.raw.write(self.stream.flush(zlib.Z_SYNC_FLUSH))
+        self.raw.flush()
+
+    def close(self):
+        self.raw.write(self.stream.flush())
+        self.raw.close()
+
+
+class _TeeJob(object):
+    def __init__(self, job_id, argv):
+        self.job_id = job_id
+        self.argv = argv
+        self.fields = {
+            "job_id": job_id,
+            "command": re.sub(r"[^\w.-]", "_", argv[0] if argv else "job"),
+            "date": time.strftime("%Y-%m-%d"),
+            "time": time.strftime("%H%M%S"),
+        }
+        self.part = 0
+        self.file = None
+        self.size = 0
+        self.opened = 0.0
+        self.pending = []
+        self.pending_size = 0
+
+
+class OutputTee(object):
+    """write the output of every job to log files below `directory`
+
+    `write` only queues the text, so it never blocks the job or the GUI. A
+    daemon thread joins the text of a job into writes of `buffer_size`
+    bytes, compresses them with `compress` ('gzip', 'zlib' or None) and
+    starts a new part once a file holds `max_bytes` of output or is
+    `max_age` seconds old. `layout` is formatted with the job_id, command,
+    date, time and part of the file.
+    """
+
+    suffixes = {"gzip": ".gz", "zlib": ".zz", None: ""}
+
+    def __init__(
+        self,
+        directory,
+        layout="{date}/{command}-{job_id}{part}.log",
+        compress="gzip",
+        level=6,
+        max_bytes=256 << 20,
+        max_age=None,
+        buffer_size=1 << 20,
+        flush_interval=1.0,
+    ):
+        if compress not in self.suffixes:
+            raise ValueError(f"unknown compression {compress!r}")
+        self.directory = directory
+        self.layout = layout
+        self.compress = compress
+        self.level = level
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self.paths = {}
+        self.thread = threading.Thread(target=self._run, name="quick-tee", daemon=True)
+        self.thread.start()
+
+    def open_job(self, job_id, argv):
+        self.queue.put(("open", job_id, list(argv)))
+
+    def write(self, job_id, text):
+        self.queue.put(("write", job_id, text))
+
+    def close_job(self, job_id):
+        self.queue.put(("close", job_id, None))
+
+    def flush(self):
+        """wait until everything queued so far is written"""
+        done = threading.Event()
+        self.queue.put(("flush", None, done))
+        done.wait()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(("stop", None, None))
+            self.thread.join()
+
+    def _run(self):
+        jobs = {}
+        last_flush = time.monotonic()
+        while True:
+            try:
+                op, job_id, arg = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                op = None
+            if op == "write":
+                state = jobs.get(job_id)
+                if state is not None:
+                    state.pending.append(arg)
+                    state.pending_size += len(arg)
+                    if state.pending_size >= self.buffer_size:
+                        self._flush(state)
+            elif op == "open":
+                jobs[job_id] = _TeeJob(job_id, arg)
+                jobs[job_id].pending.append(f"$ {' '.join(arg)}\n")
+            elif op == "close":
+                state = jobs.pop(job_id, None)
+                if state is not None:
+                    self._flush(state)
+                    self._close(state)
+            elif op in ("flush", "stop"):
+                for state in jobs.values():
+                    self._flush(state)
+                    if state.file is not None:
+                        state.file.flush()
+                if op == "stop":
+                    for state in jobs.values():
+                        self._close(state)
+                    return
+                arg.set()
+            now = time.monotonic()
+            if op is None or now - last_flush >= self.flush_interval:
+                # slow jobs are written at least every `flush_interval`
+                last_flush = now
+                for state in jobs.values():
+                    self._flush(state)
+
+    def _open(self, state):
+        fields = dict(state.fields, part=f".{state.part}" if state.part else "")
+        path = os.path.join(
+            self.directory,
+            self.layout.format(**fields) + self.suffixes[self.compress],
+        )
+        os.makedirs(os.path.dirname(path) or os.curdir, exist_ok=True)
+        if self.compress == "gzip":
+            state.file = gzip.open(path, "wb", compresslevel=self.level)
+        elif self.compress == "zlib":
+            state.file = _ZlibFile(path, self.level)
+        else:
+            state.file = open(path, "wb")
+        state.size = 0
+        state.opened = time.monotonic()
+        self.paths.setdefault(state.job_id, []).append(path)
+
+    def _flush(self, state):
+        if not state.pending:
+            return
+        data = "".join(state.pending).encode("utf-8", "replace")
+        state.pending = []
+        state.pending_size = 0
+        try:
+            if state.file is None:
+                self._open(state)
+            state.file.write(data)
+            state.size += len(data)
+            if state.size >= self.max_bytes or (
+                self.max_age is not None
+                and time.monotonic() - state.opened >= self.max_age
+            ):
+                self._close(state)
+                state.part += 1
+        except OSError as e:
+            logging.error(f"cannot write the log of job {state.job_id}: {e!r}")
+
+    def _close(self, state):
+        if state.file is None:
+            return
+        try:
+            state.file.close()
+        except OSError as e:
+            logging.error(f"cannot write the log of job {state.job_id}: {e!r}")
+        state.file = None
+
+
+def list_subcommands(group):
+    """the context and subcommand names of `group`, without resolving them"""
+    ctx = click.Context(group, resilient_parsing=True)
+    return ctx, group.list_commands(ctx)
+
+
+class _ResolveSignals(QtCore.QObject):
+    resolved = QtCore.Signal(object)
+
+
+class _ResolveRunnable(QtCore.QRunnable):
+    def __init__(self, tab):
+        super(_ResolveRunnable, self).__init__()
+        self.resolve = tab.resolve
+        self.signals = tab.signals
+
+    @QtCore.Slot()
+    def run(self):
+        try:
+            cmd = self.resolve()
+        except Exception as e:
+            logging.error(f"failed to load command: {e!r}")
+            cmd = e
+        self.signals.resolved.emit(cmd)
+
+
+class _LazyTab(QtWidgets.QWidget):
+    """tab page built on first show
+
+    `resolve` returns the click command (importing it is the slow part, so
+    it runs on the global thread pool), `build` turns it into a layout.
+    """
+
+    def __init__(self, resolve, build, parent=None):
+        super(_LazyTab, self).__init__(parent)
+        self.resolve = resolve
+        self.build = build
+        self.built = False
+        self._pending = False
+        self.signals = _ResolveSignals(self)
+        self.signals.resolved.connect(self._build)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.placeholder = _HelpLabel("loading...")
+        layout.addWidget(self.placeholder)
+
+    def showEvent(self, event):
+        self.ensure_built()
+        super(_LazyTab, self).showEvent(event)
+
+    def ensure_built(self, block=False):
+        if self.built:
+            return
+        if block:
+            try:
+                cmd = self.resolve()
+            except Exception as e:
+                logging.error(f"failed to load command: {e!r}")
+                cmd = e
+            self._build(cmd)
+        elif not self._pending:
+            self._pending = True
+            QtCore.QThreadPool.globalInstance().start(_ResolveRunnable(self))
+
+    @QtCore.Slot(object)
+    def _build(self, cmd):
+        if self.built:
+            return
+        if cmd is None or isinstance(cmd, Exception):
+            self.placeholder.setText(f"failed to load command: {cmd!r}")
+            self._pending = False
+            return
+        self.built = True
+        page = QtWidgets.QWidget()
+        page.setLayout(self.build(cmd))
+        self.placeholder.hide()
+        self.layout().addWidget(page)
+
+
+class CommandIndex(object):
+    """flat search index over a click command tree
+
+    Every command and parameter becomes one entry ``(path, name, label, key,
+    haystack)``; `name` is None for commands. `key` holds the casefolded
+    command path, `show_name`, parameter name and opts, `haystack` adds the
+    help text.
+    """
+
+    def __init__(self, func=None):
+        self.entries = []
+        self._commands = {}
+        if func is not None:
+            self.add_command((), func)
+
+    def clear(self):
+        self.entries = []
+        self._commands = {}
+
+    def add_name(self, path, name=None):
+        """index a command by name only, before it is resolved"""
+        label = " ".join(path) or name
+        self._set_command(path, (path, None, label, label.casefold(), label.casefold()))
+
+    def _set_command(self, path, entry):
+        i = self._commands.get(path)
+        if i is None:
+            self._commands[path] = len(self.entries)
+            self.entries.append(entry)
+        else:
+            self.entries[i] = entry
+
+    def add_command(self, path, func, recursive=True):
+        """index `func` and its parameters
+
+        With `recursive`, subcommands are resolved through
+        `list_commands`/`get_command`, which imports lazy groups.
+        """
+        cmd_path = " ".join(path)
+        key = (cmd_path or func.name).casefold()
+        self._set_command(
+            path,
+            (
+                path,
+                None,
+                cmd_path or func.name,
+                key,
+                f"{key} {func.help or ''}".casefold(),
+            ),
+        )
+        for para in func.params:
+            show_name = getattr(para, "show_name", _missing)
+            show_name = para.name if show_name is _missing else show_name
+            label = f"{cmd_path} {show_name}".strip()
+            key = " ".join([cmd_path, str(show_name), para.name or "", *para.opts])
+            key = key.casefold()
+            haystack = f"{key} {getattr(para, 'help', None) or ''}".casefold()
+            self.entries.append((path, para.name, label, key, haystack))
+        if recursive and isinstance(func, click.MultiCommand):
+            ctx, names = list_subcommands(func)
+            for name in names:
+                f = func.get_command(ctx, name)
+                if f is not None:
+                    self.add_command(path + (name,), f)
+
+    def search(self, query, limit=100):
+        """entries matching `query`, best first
+
+        Substring hits rank by position, with hits in `key` before hits in
+        the help text; otherwise the query letters have to appear in order
+        in `key`.
+        """
+        query = query.strip().casefold()
+        if not query:
+            return []
+        fuzzy = re.compile(
+            re.escape(query[0])
+            + "".join(f"[^{re.escape(c)}]*{re.escape(c)}" for c in query[1:])
+        ).search
+        scored = []
+        for i, (path, name, label, key, haystack) in enumerate(self.entries):
+            pos = haystack.find(query)
+            if pos >= 0:
+                scored.append((pos if pos < len(key) else 500 + pos, i))
+            elif fuzzy(key):
+                scored.append((1000 + len(key), i))
+        return [self.entries[i] for _, i in heapq.nsmallest(limit, scored)]
+
+
+class _Navigator(QtWidgets.QWidget):
+    """search box and hit list jumping to commands and options"""
+
+    def __init__(self, index, goto, parent=None):
+        super(_Navigator, self).__init__(parent)
+        self.index = index
+        self.goto = goto
+        self.search = _InputLineEdit()
+        self.search.setPlaceholderText("search commands and options")
+        self.search.setClearButtonEnabled(True)
+        self.hits = QtWidgets.QListWidget()
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.search)
+        layout.addWidget(self.hits)
+        self.search.textChanged.connect(self.update_hits)
+        self.search.returnPressed.connect(self.goto_first)
+        self.hits.itemActivated.connect(self.goto_item)
+        self.hits.itemClicked.connect(self.goto_item)
+
+    @QtCore.Slot(str)
+    def update_hits(self, text):
+        self.hits.clear()
+        for path, name, label, _, _ in self.index.search(text):
+            item = QtWidgets.QListWidgetItem(label if name else f"[{label}]")
+            item.setData(_GTypeRole, (path, name))
+            self.hits.addItem(item)
+
+    @QtCore.Slot()
+    def goto_first(self):
+        if self.hits.count():
+            self.goto_item(self.hits.item(0))
+
+    def goto_item(self, item):
+        self.goto(*item.data(_GTypeRole))
+
+
+def _is_gui_option(para):
+    callback = getattr(para, "callback", None)
+    return para.name == "gui" and getattr(callback, "__name__", "") == "run_gui_it"
+
+
+class SourceWatcher(QtCore.QObject):
+    """re-execute the file defining `func` whenever it changes
+
+    The file is run under a private module name, so its ``__main__`` block is
+    skipped, and the object bound to the same global name is emitted.
+    """
+
+    reloaded = QtCore.Signal(object)
+    delay = 300
+
+    def __init__(self, func, parent=None):
+        super(SourceWatcher, self).__init__(parent)
+        if func.callback is None:
+            # e.g. a group built without one, nothing tells its source file
+            raise ValueError(f"cannot watch {func.name}: it has no callback")
+        module = inspect.getmodule(func.callback)
+        try:
+            self.path = inspect.getsourcefile(func.callback)
+        except TypeError:
+            self.path = None
+        if self.path is None:
+            raise ValueError(f"cannot watch {func.name}: no source file found")
+        names = vars(module).items() if module is not None else ()
+        self.name = next((k for k, v in names if v is func), None)
+        if self.name is None:
+            raise ValueError(
+                f"cannot watch {func.name}: it is not a global of {self.path}"
+            )
+        self._watcher = QtCore.QFileSystemWatcher([self.path], self)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.delay)
+        self._watcher.fileChanged.connect(self._timer.start)
+        self._timer.timeout.connect(self.reload)
+
+    @QtCore.Slot()
+    def reload(self):
+        # editors saving by rename drop the file from the watcher
+        if self.path not in self._watcher.files():
+            self._watcher.addPath(self.path)
+        try:
+            func = runpy.run_path(self.path, run_name="__quick_reload__")[self.name]
+        except Exception as e:
+            logging.error(f"failed to reload {self.path}: {e!r}")
+            return
+        func.params = [p for p in func.params if not _is_gui_option(p)]
+        self.reloaded.emit(func)
+
+
+def _glob_root(pattern):
+    """the deepest directory of `pattern` without wildcards"""
+    parts = []
+    for part in os.path.normpath(pattern).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    else:
+        parts.pop()
+    return os.sep.join(parts) or os.curdir
+
+
+class AutoRunner(QtCore.QObject):
+    """re-run a command when the files it reads change
+
+    The files named by the `click.Path` parameters of the form, plus the
+    matches of extra glob patterns, are watched with `QFileSystemWatcher`
+    (inotify on Linux). Bursts of changes are debounced into one run, and
+    a run still in flight is cancelled first. Paths are read from the form
+    again when a path field is edited and at every run.
+    """
+
+    delay = 300
+
+    def __init__(self, opt_set, run, cancel, parent=None):
+        super(AutoRunner, self).__init__(parent)
+        self.opt_set = opt_set
+        self.run = run
+        self.cancel = cancel
+        self.enabled = False
+        self.globs = []
+        self.job = None
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.delay)
+        self._watcher.fileChanged.connect(self.changed)
+        self._watcher.directoryChanged.connect(self.changed)
+        self._timer.timeout.connect(self.rerun)
+        # rows rebuilt later get new widgets, they are followed at refresh
+        self._edits = set()
+        self._edited = QtCore.QTimer(self)
+        self._edited.setSingleShot(True)
+        self._edited.setInterval(self.delay)
+        self._edited.timeout.connect(self.refresh)
+        self.follow_edits()
+
+    def widget(self):
+        box = QtWidgets.QWidget()
+        layout = QtWidgets.QHBoxLayout(box)
+        layout.setContentsMargins(0, 0, 0, 0)
+        check = QtWidgets.QCheckBox("Auto-r&un on change")
+        check.setToolTip("run again when a watched file changes")
+        extra = QtWidgets.QLineEdit()
+        extra.setPlaceholderText("extra globs, e.g. data/*.csv")
+        check.toggled.connect(self.set_enabled)
+        extra.editingFinished.connect(lambda: self.set_globs(extra.text().split()))
+        layout.addWidget(check)
+        layout.addWidget(extra)
+        return box
+
+    def watched_paths(self):
+        paths = set()
+        for para, value_func in zip(self.opt_set.params, self.opt_set.params_func):
+            if isinstance(para.type, click.Path):
+                flags = set(para.opts) | set(para.secondary_opts)
+                # an empty field is no path, not the working directory
+                paths.update(v for v in value_func() if v.strip() and v not in flags)
+        for pattern in self.globs:
+            paths.update(glob.glob(pattern, recursive=True))
+            # new matches show up as a change of the directory
+            paths.add(_glob_root(pattern))
+        return paths
+
+    def follow_edits(self):
+        """refresh the watched paths when a path field of the form is edited"""
+        for para, widget in zip(self.opt_set.params, self.opt_set.widgets):
+            if not isinstance(para.type, click.Path):
+                continue
+            for w in _iter_widgets(widget[1:]):
+                if isinstance(w, QtWidgets.QLineEdit) and w not in self._edits:
+                    self._edits.add(w)
+                    w.textChanged.connect(self._edited.start)
+
+    def refresh(self):
+        self.follow_edits()
+        new = set()
+        for path in self.watched_paths():
+            path = os.path.abspath(path)
+            if not os.path.exists(path):
+                # wait for it to be created
+                path = os.path.dirname(path)
+            if os.path.exists(path):
+                new.add(path)
+        if not self.enabled:
+            new = set()
+        # editors saving by rename drop the file from the watcher, re-adding
+        # every path brings it back
+        old = self._watcher.files() + self._watcher.directories()
+        if old:
+            self._watcher.removePaths(old)
+        if new:
+            self._watcher.addPaths(sorted(new))
+
+    @QtCore.Slot(bool)
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self._timer.stop()
+        self.refresh()
+
+    def set_globs(self, globs):
+        self.globs = list(globs)
+        self.refresh()
+
+    @QtCore.Slot(str)
+    def changed(self, path):
+        if self.enabled:
+            self._timer.start()
+
+    @QtCore.Slot()
+    def rerun(self):
+        if self.job is not None and not self.job.done:
+            self.cancel(self.job.job_id)
+        self.refresh()
+        self.job = self.run()
+
+
+class JobHost(QtCore.QObject):
+    """worker pool, running jobs and their panels
+
+    Owned by a standalone `App`, or by a `Dashboard` sharing it between all
+    the programs it hosts.
+    """
+
+    def __init__(
+        self,
+        output="gui",
+        parent=None,
+        sample_interval=0.5,
+        log_dir=None,
+        workers=None,
+        log_level=logging.DEBUG,
+    ):
+        super(JobHost, self).__init__(parent)
+        self.threadpool = QtCore.QThreadPool(self)
+        self.tee = log_dir
+        if log_dir is not None and not isinstance(log_dir, OutputTee):
+            self.tee = OutputTee(log_dir)
+        self.remote = workers
+        if workers is not None:
+            # only loaded with workers, it brings in the server modules
+            import quick_worker
+
+            if not isinstance(workers, quick_worker.WorkerPool):
+                self.remote = quick_worker.WorkerPool(workers)
+        self.outputPanel = None
+        self.outputEdit = self.initOutput(output)
+        self.job_signals = JobSignals(self)
+        self.errorPanel = ErrorPanel()
+        self.job_signals.failed.connect(self.errorPanel.add_error)
+        self.jobPanel = JobPanel()
+        self.job_signals.started.connect(self.jobPanel.add_job)
+        self.job_signals.progress.connect(self.jobPanel.update_progress)
+        self.job_signals.finished.connect(self.jobPanel.finish_job)
+        self.job_signals.stages.connect(self.jobPanel.update_stages)
+        self.job_signals.resources.connect(self.jobPanel.update_resources)
+        self.jobs = {}
+        self.monitor = ResourceMonitor(
+            self.jobs, self.job_signals, sample_interval, self
+        )
+        self.job_signals.finished.connect(
+            lambda job_id, ok: self.jobs.pop(job_id, None)
+        )
+        self.jobPanel.cancelRequested.connect(self.cancel_job)
+        install_progress_hooks()
+        self.resultPanel = ResultPanel()
+        self.job_signals.result.connect(self.resultPanel.add_result)
+        self.logPanel = None
+        self._root_level = None
+        if output == "gui":
+            self.logPanel = LogPanel()
+            self.logPanel.handler.setLevel(log_level)
+            root = logging.getLogger()
+            root.addHandler(self.logPanel.handler)
+            # the root logger drops everything below WARNING by default
+            if root.level > log_level:
+                self._root_level = root.level
+                root.setLevel(log_level)
+
+    def initOutput(self, output):
+        if output == "gui":
+            sys.stdout = GuiStream()
+            sys.stderr = sys.stdout
+            self.outputPanel = OutputPanel()
+            sys.stdout.textWritten.connect(self.outputPanel.print)
+            sys.stdout.textWritten.connect(self.outputPanel.show)
+            return self.outputPanel.edit
+        else:
+            if self.tee is not None and not isinstance(sys.stdout, _TeeStream):
+                sys.stdout = _TeeStream(sys.stdout)
+                sys.stderr = _TeeStream(sys.stderr)
+            return None
+
+    def close(self):
+        if self.logPanel is not None:
+            logging.getLogger().removeHandler(self.logPanel.handler)
+        if self._root_level is not None:
+            logging.getLogger().setLevel(self._root_level)
+            self._root_level = None
+        if self.tee is not None:
+            self.tee.close()
+        if self.remote is not None:
+            self.remote.close()
+
+    def start_job(self, runcmd, new_thread):
+        # the pool must not delete jobs that can still be cancelled
+        runcmd.setAutoDelete(False)
+        runcmd.tee = self.tee
+        self.jobs[runcmd.job_id] = runcmd
+        is_async = runcmd.is_async
+        if self.remote is not None and runcmd.pipeline is None:
+            # pipelines stay here, their stages report to the job panel
+            runcmd.remote = self.remote
+            runcmd.run()
+        elif new_thread and not is_async:
+            self.threadpool.start(runcmd)
+        else:
+            # coroutine commands only parse here and run on `event_loop()`
+            runcmd.run()
+        return runcmd
+
+    @QtCore.Slot(int)
+    def cancel_job(self, job_id):
+        runcmd = self.jobs.get(job_id)
+        if runcmd is None:
+            return
+        runcmd.cancel()
+        if runcmd.future is None and self.threadpool.tryTake(runcmd):
+            # never started
+            runcmd.finish(False)
+
+
+class App(QtWidgets.QWidget):
+    def __init__(
+        self,
+        func,
+        run_exit,
+        new_thread,
+        output="gui",
+        left=10,
+        top=10,
+        width=400,
+        height=140,
+        watch=False,
+        host=None,
+        sample_interval=0.5,
+        log_dir=None,
+        workers=None,
+        log_level=logging.DEBUG,
+    ):
+        """
+        Parameters
+        ----------
+        output : str
+            'gui': [default] redirect screen output to the gui
+            'term': do nothing
+        watch : bool
+            reload the command when its source file changes
+        host : JobHost
+            share the pool, jobs and panels of a `Dashboard` instead of
+            creating them, `output` is then ignored
+        sample_interval : float
+            seconds between two resource samples of a running job, 0 to
+            turn sampling off
+        log_dir : str or OutputTee
+            also write the output of every job to a compressed log file
+            below this directory
+        workers : list or quick_worker.WorkerPool
+            ``"host:port"`` of `quick_worker` daemons running the jobs
+            instead of this process
+        log_level : int
+            lowest level of the records shown in the log panel, the root
+            logger is lowered to it while the app runs
+        """
+        super().__init__()
+        self.new_thread = new_thread
+        self.title = func.name
+        self.func = func
+        self.layouts = {}
+        self.tabs = {}
+        self.index = CommandIndex()
+        self.embedded = host is not None
+        if self.embedded:
+            # exiting would take every other program of the process with it
+            run_exit = False
+        self.initUI(run_exit, QtCore.QRect(left, top, width, height))
+        if host is None:
+            host = JobHost(output, self, sample_interval, log_dir, workers, log_level)
+        self.host = host
+        self.threadpool = self.host.threadpool
+        self.outputEdit = self.host.outputEdit
+        self.outputPanel = self.host.outputPanel
+        self.job_signals = self.host.job_signals
+        self.errorPanel = self.host.errorPanel
+        self.jobPanel = self.host.jobPanel
+        self.jobs = self.host.jobs
+        self.logPanel = self.host.logPanel
+        self.resultPanel = self.host.resultPanel
+        self.watcher = None
+        if watch:
+            self.watcher = SourceWatcher(func, self)
+            self.watcher.reloaded.connect(self.reload_func)
+
+    def closeEvent(self, event):
+        if self.embedded:
+            return
+        self.host.close()
+        app = QtWidgets.QApplication.instance()
+        app.quit()
+
+    def initCommandUI(self, func, run_exit, parent_layout=None, path=()):
+        opt_set = CommandLayout(func, run_exit, parent_layout=parent_layout)
+        self.layouts[path] = opt_set
+        self.index.add_command(path, func, recursive=False)
+        if isinstance(func, click.MultiCommand):
+            tabs = opt_set.tabs = _InputTabWidget()
+            ctx, names = list_subcommands(func)
+            for cmd in names:
+                self._add_lazy_tab(opt_set, func, ctx, cmd, path + (cmd,))
+            opt_set.addWidget(tabs, opt_set.rowCount(), 0, 1, 2)
+            if getattr(func, "chain", False):
+                install_pipeline_hook(func)
+                opt_set.pipeline = PipelineBuilder(
+                    names, partial(self.run_pipeline, path)
+                )
+                opt_set.addWidget(opt_set.pipeline, opt_set.rowCount(), 0, 1, 2)
+            # return opt_set
+        elif isinstance(func, click.Command):
+            new_thread = getattr(func, "new_thread", self.new_thread)
+            args = [
+                {
+                    "label": "&Run",
+                    "cmd_slot": partial(
+                        self.run_cmd,
+                        new_thread=new_thread,
+                        is_async=is_async_command(func),
+                    ),
+                    "tooltip": "run command",
+                },
+                {
+                    "label": "&Copy",
+                    "cmd_slot": self.copy_cmd,
+                    "tooltip": "copy command to clipboard",
+                },
+            ]
+            if opt_set.lazy_defaults:
+                args.append(
                     {
-                        "label": "&Copy",
-                        "cmd_slot": self.copy_cmd,
-                        "tooltip": "copy command to clipboard",
-                    },
-                ]
+                        "label": "Re&fresh",
+                        "cmd_slot": opt_set.refresh_defaults,
+                        "tooltip": "recompute the default values",
+                        "sysargv": False,
+                    }
+                )
+            opt_set.autorun = AutoRunner(
+                opt_set,
+                partial(
+                    self.rerun_cmd,
+                    opt_set,
+                    new_thread=new_thread,
+                    is_async=is_async_command(func),
+                ),
+                self.cancel_job,
+                parent=self,
             )
+            opt_set.addWidget(opt_set.autorun.widget(), opt_set.rowCount(), 0, 1, 2)
+            opt_set.add_cmd_buttons(args=args)
         return opt_set
 
+    def _add_lazy_tab(self, opt_set, group, ctx, cmd, path, idx=-1):
+        tab = _LazyTab(
+            partial(group.get_command, ctx, cmd),
+            partial(
+                self.initCommandUI,
+                run_exit=opt_set.run_exit,
+                parent_layout=opt_set,
+                path=path,
+            ),
+        )
+        self.index.add_name(path)
+        self.tabs[path] = (opt_set.tabs, opt_set.tabs.insertTab(idx, tab, cmd))
+
+    @QtCore.Slot(object)
+    def reload_func(self, func):
+        """replace the command tree by `func`, keeping unchanged widgets"""
+        if not isinstance(func, type(self.func)):
+            logging.error(f"cannot reload {self.func.name}: type changed")
+            return
+        self.func = func
+        changed = self._update_command((), func)
+        self.index.clear()
+        for path in self.tabs:
+            self.index.add_name(path)
+        for path, opt_set in self.layouts.items():
+            self.index.add_command(path, opt_set.func, recursive=False)
+        logging.info(f"Reloaded {func.name}: {changed} parameter(s) rebuilt")
+
+    def _update_command(self, path, func):
+        opt_set = self.layouts.get(path)
+        if opt_set is None:
+            return 0
+        changed = opt_set.update_func(func)
+        if not isinstance(func, click.MultiCommand):
+            return changed
+        tabs = opt_set.tabs
+        ctx, names = list_subcommands(func)
+        for i in reversed(range(tabs.count())):
+            if tabs.tabText(i) not in names:
+                gone = path + (tabs.tabText(i),)
+                tabs.widget(i).deleteLater()
+                tabs.removeTab(i)
+                for p in [p for p in self.tabs if p[: len(gone)] == gone]:
+                    self.tabs.pop(p)
+                    self.layouts.pop(p, None)
+        self._reindex_tabs(path, tabs)
+        for i, cmd in enumerate(names):
+            sub_path = path + (cmd,)
+            if sub_path not in self.tabs:
+                self._add_lazy_tab(opt_set, func, ctx, cmd, sub_path, i)
+                # the tabs behind it moved
+                self._reindex_tabs(path, tabs)
+                continue
+            tab = tabs.widget(self.tabs[sub_path][1])
+            tab.resolve = partial(func.get_command, ctx, cmd)
+            if tab.built:
+                sub = tab.resolve()
+                if sub is not None:
+                    changed += self._update_command(sub_path, sub)
+        return changed
+
+    def _reindex_tabs(self, path, tabs):
+        for i in range(tabs.count()):
+            self.tabs[path + (tabs.tabText(i),)] = (tabs, i)
+
     def initUI(self, run_exit, geometry):
         self.run_exit = run_exit
         self.setWindowTitle(self.title)
@@ -929,8 +4636,49 @@ class App(QtWidgets.QWidget):
             self.func,
             run_exit,
         )
-        self.setLayout(self.opt_set)
-        self.show()
+        if isinstance(self.func, click.MultiCommand):
+            self.navigator = _Navigator(self.index, self.goto)
+            self.navigator.setMaximumWidth(max(geometry.width() // 3, 200))
+            layout = QtWidgets.QHBoxLayout()
+            layout.addWidget(self.navigator)
+            layout.addLayout(self.opt_set, 1)
+            self.setLayout(layout)
+        else:
+            self.setLayout(self.opt_set)
+        if not self.embedded:
+            self.show()
+
+    def goto(self, path, name=None):
+        """show the form of command `path` and focus its parameter `name`"""
+        opt_set = self.build_path(path, show=True)
+        if opt_set is None:
+            return
+        for para, widget in zip(opt_set.params, opt_set.widgets):
+            if para.name == name:
+                for w in _iter_widgets(widget[1:]):
+                    w.setFocus()
+                    break
+                break
+
+    def build_path(self, path, show=False):
+        """build the form of command `path` if needed and return its layout"""
+        for i in range(1, len(path) + 1):
+            tabs, idx = self.tabs[path[:i]]
+            tabs.widget(idx).ensure_built(block=True)
+            if show:
+                tabs.setCurrentIndex(idx)
+        return self.layouts.get(path)
+
+    def run_pipeline(self, path, names):
+        """run the subcommands `names` of chained group `path` as a pipeline"""
+        sys.argv = []
+        self.layouts[path].add_sysargv()
+        for name in names:
+            opt_set = self.build_path(path + (name,))
+            sys.argv += generate_sysargv([(name, opt_set.params_func)])
+        runcmd = RunCommand(self.func, self.run_exit, signals=self.job_signals)
+        runcmd.pipeline = list(names)
+        return self.start_job(runcmd, new_thread=True)
 
     @QtCore.Slot()
     def copy_cmd(self):
@@ -944,12 +4692,88 @@ class App(QtWidgets.QWidget):
         msg.setText(f"copy '{cmd_text}' to clipboard")
         msg.exec()
 
-    def run_cmd(self, new_thread):
-        runcmd = RunCommand(self.func, self.run_exit)
-        if new_thread:
-            self.threadpool.start(runcmd)
-        else:
-            runcmd.run()
+    def run_cmd(self, new_thread, is_async=False):
+        runcmd = RunCommand(
+            self.func, self.run_exit, signals=self.job_signals, is_async=is_async
+        )
+        return self.start_job(runcmd, new_thread)
+
+    def rerun_cmd(self, opt_set, new_thread, is_async=False):
+        """run the command of `opt_set` with the current form values"""
+        sys.argv = []
+        opt_set.add_sysargv()
+        return self.run_cmd(new_thread, is_async=is_async)
+
+    def start_job(self, runcmd, new_thread):
+        return self.host.start_job(runcmd, new_thread)
+
+    @QtCore.Slot(int)
+    def cancel_job(self, job_id):
+        self.host.cancel_job(job_id)
+
+
+class Dashboard(QtWidgets.QWidget):
+    """host several click programs in one window
+
+    Programs are listed in a sidebar and their `App` is only built when
+    first selected. All of them share one `JobHost`, so one worker pool,
+    job queue and set of panels serve the whole process.
+    """
+
+    def __init__(
+        self,
+        new_thread=False,
+        output="gui",
+        width=800,
+        height=500,
+        title="quick",
+        sample_interval=0.5,
+        log_dir=None,
+        workers=None,
+        log_level=logging.DEBUG,
+    ):
+        super(Dashboard, self).__init__()
+        self.new_thread = new_thread
+        self.host = JobHost(output, self, sample_interval, log_dir, workers, log_level)
+        self.programs = []
+        self.apps = {}
+        self.setWindowTitle(title)
+        self.resize(width, height)
+        self.sidebar = QtWidgets.QListWidget()
+        self.sidebar.setMaximumWidth(max(width // 4, 160))
+        self.stack = QtWidgets.QStackedWidget()
+        layout = QtWidgets.QHBoxLayout(self)
+        layout.addWidget(self.sidebar)
+        layout.addWidget(self.stack, 1)
+        self.sidebar.currentRowChanged.connect(self.show_program)
+
+    def add_program(self, func, name=None, **kargs):
+        """register click command `func`, `kargs` are passed on to `App`"""
+        kargs.setdefault("new_thread", self.new_thread)
+        self.programs.append((func, kargs))
+        self.stack.addWidget(QtWidgets.QWidget())
+        self.sidebar.addItem(name or func.name)
+        if self.sidebar.currentRow() < 0:
+            self.sidebar.setCurrentRow(0)
+
+    @QtCore.Slot(int)
+    def show_program(self, row):
+        if row < 0:
+            return
+        if row not in self.apps:
+            func, kargs = self.programs[row]
+            app = App(func, run_exit=False, host=self.host, **kargs)
+            placeholder = self.stack.widget(row)
+            self.stack.insertWidget(row, app)
+            self.stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+            self.apps[row] = app
+        self.stack.setCurrentIndex(row)
+
+    def closeEvent(self, event):
+        self.host.close()
+        app = QtWidgets.QApplication.instance()
+        app.quit()
 
 
 def gui_it(click_func, style="qdarkstyle", **kargs) -> None:
@@ -959,10 +4783,7 @@ def gui_it(click_func, style="qdarkstyle", **kargs) -> None:
     click_func
     `new_thread` is used for qt-based func, like matplotlib
     """
-    global _gstyle
-    _gstyle = GStyle(style)
-    app = QtWidgets.QApplication(sys.argv)
-    app.setStyleSheet(_gstyle.stylesheet)
+    app = _style_app(style)
 
     # set the default value for argvs
     kargs["run_exit"] = kargs.get("run_exit", False)
@@ -972,6 +4793,35 @@ def gui_it(click_func, style="qdarkstyle", **kargs) -> None:
     sys.exit(app.exec())
 
 
+def _style_app(style):
+    """the QApplication of the process, created and styled once"""
+    global _gstyle
+    app = QtWidgets.QApplication.instance()
+    if app is None:
+        app = QtWidgets.QApplication(sys.argv)
+    if getattr(app, "_quick_style", None) != style:
+        _gstyle = GStyle(style)
+        _gstyle.apply(app)
+        app._quick_style = style
+    return app
+
+
+def gui_dashboard(click_funcs, style="qdarkstyle", **kargs) -> None:
+    """
+    Parameters
+    ----------
+    click_funcs
+    the commands to host in one window, sharing one QApplication, style,
+    job queue and worker pool; `kargs` are passed on to `Dashboard`
+    """
+    app = _style_app(style)
+    ex = Dashboard(**kargs)
+    for click_func in click_funcs:
+        ex.add_program(click_func)
+    ex.show()
+    sys.exit(app.exec())
+
+
 def gui_option(**kargs) -> click.core.BaseCommand:
     """decorator for adding '--gui' option to command"""
 
@@ -981,7 +4831,7 @@ def gui_option(**kargs) -> click.core.BaseCommand:
         def run_gui_it(ctx, param, value):
             if not value or ctx.resilient_parsing:
                 return
-            f.params = [p for p in f.params if not p.name == "gui"]
+            f.params = [p for p in f.params if not _is_gui_option(p)]
             gui_it(f, **kargs)
             ctx.exit()
 
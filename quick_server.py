@@ -0,0 +1,511 @@
+import sys
+import hmac
+import html
+import json
+import shlex
+import asyncio
+import inspect
+import itertools
+import threading
+import secrets
+import traceback
+import contextvars
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import click
+
+# serve the forms of `quick` from a browser, without loading Qt
+
+_UNSET = getattr(click.core, "UNSET", None)
+_current_job = contextvars.ContextVar("quick_server_job", default=None)
+_job_ids = itertools.count(1)
+_HEARTBEAT = 15.0
+
+_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; max-width: 50em; margin: 2em auto; }}
+label {{ font-family: monospace; font-weight: bold; display: block; }}
+fieldset {{ margin-bottom: 1em; }}
+input, select {{ margin: 0.2em 0 0.8em; }}
+.help {{ font-family: serif; color: #555; }}
+pre {{ background: #222; color: #eee; padding: 1em; white-space: pre-wrap; }}
+</style></head>
+<body>{nav}<h1>{title}</h1>
+{body}
+</body></html>
+"""
+
+_FOLLOW = """<pre id="out"></pre><p id="status">running</p>
+<script>
+var out = document.getElementById("out");
+var events = new EventSource("{url}");
+events.onmessage = function (e) {{
+    out.textContent += JSON.parse(e.data);
+}};
+events.addEventListener("done", function (e) {{
+    document.getElementById("status").textContent = JSON.parse(e.data);
+    events.close();
+}});
+</script>
+"""
+
+
+def param_default(para, ctx):
+    """the default of `para` as shown in a form, None when there is none"""
+    try:
+        value = para.get_default(ctx)
+    except Exception:
+        return None
+    if _UNSET is not None and value is _UNSET:
+        return None
+    return value
+
+
+def resolve(func, path):
+    """the commands from `func` down to subcommand `path`, None if missing"""
+    cmds = [func]
+    for name in path:
+        group = cmds[-1]
+        if not isinstance(group, click.MultiCommand):
+            return None
+        cmd = group.get_command(click.Context(group), name)
+        if cmd is None:
+            return None
+        cmds.append(cmd)
+    return cmds
+
+
+def _input(name, para, default):
+    name = html.escape(name, quote=True)
+    if isinstance(para, click.Option) and para.count:
+        return (
+            f'<input type="number" min="0" step="1" name="{name}" '
+            f'value="{default or 0}">'
+        )
+    if isinstance(para, click.Option) and para.is_flag:
+        checked = " checked" if default else ""
+        return f'<input type="checkbox" name="{name}"{checked}>'
+    if para.multiple or para.nargs != 1:
+        value = " ".join(shlex.quote(str(v)) for v in default or ())
+        return (
+            f'<input type="text" name="{name}" size="40" '
+            f'placeholder="space separated" value="{html.escape(value, quote=True)}">'
+        )
+    if isinstance(para.type, click.Choice):
+        options = [] if para.required else ['<option value=""></option>']
+        for choice in para.type.choices:
+            selected = " selected" if choice == default else ""
+            choice = html.escape(str(choice), quote=True)
+            options.append(f'<option value="{choice}"{selected}>{choice}</option>')
+        return f'<select name="{name}">{"".join(options)}</select>'
+    kind = "text"
+    if isinstance(para.type, (click.types.IntParamType, click.types.IntRange)):
+        kind = 'number" step="1'
+    elif isinstance(para.type, (click.types.FloatParamType, click.types.FloatRange)):
+        kind = 'number" step="any'
+    elif getattr(para, "hide_input", False):
+        kind = "password"
+    value = "" if default is None else html.escape(str(default), quote=True)
+    return f'<input type="{kind}" name="{name}" size="40" value="{value}">'
+
+
+def command_form(cmd, level):
+    """html fields for the parameters of `cmd`, named ``<level>.<name>``"""
+    ctx = click.Context(cmd)
+    fields = []
+    for para in cmd.params:
+        if getattr(para, "hidden", False):
+            continue
+        if isinstance(para, click.Option):
+            label = ", ".join(para.opts + para.secondary_opts)
+        else:
+            label = para.human_readable_name
+        if para.required:
+            label += " *"
+        field = f"<label>{html.escape(label)}</label>"
+        field += _input(f"{level}.{para.name}", para, param_default(para, ctx))
+        text = getattr(para, "help", None)
+        if text:
+            field += f'<div class="help">{html.escape(text)}</div>'
+        fields.append(field)
+    return "\n".join(fields)
+
+
+def form_argv(cmd, level, form):
+    """the command line of `cmd` for the submitted `form`
+
+    Mirrors `quick.generate_sysargv`: empty fields are left out, flags add
+    their option, multiple values are split like a shell would. Raises
+    `ValueError` for a count that is not a number or unbalanced quotes.
+    """
+    argv = []
+    for para in cmd.params:
+        values = form.get(f"{level}.{para.name}", [])
+        text = values[0].strip() if values else ""
+        if isinstance(para, click.Option) and para.count:
+            if not (text or "0").isdigit():
+                raise ValueError(f"{para.opts[0]} needs a count, not {text!r}")
+            argv += [para.opts[0]] * int(text or 0)
+            continue
+        if isinstance(para, click.Option) and para.is_flag:
+            if para.secondary_opts:
+                argv.append(para.opts[0] if values else para.secondary_opts[0])
+            elif values:
+                argv.append(para.opts[0])
+            continue
+        if not text:
+            continue
+        items = shlex.split(text) if para.multiple or para.nargs != 1 else [text]
+        if isinstance(para, click.Argument):
+            argv += items
+        elif para.multiple:
+            step = max(para.nargs, 1)
+            for i in range(0, len(items), step):
+                argv += [para.opts[0]] + items[i : i + step]
+        else:
+            argv += [para.opts[0]] + items
+    return argv
+
+
+class ServerJob(object):
+    """the output of one submitted command line, readable while it runs"""
+
+    def __init__(self, argv):
+        self.job_id = next(_job_ids)
+        self.argv = argv
+        self.chunks = []
+        self.done = False
+        self.ok = False
+        # the error written last, None when the job succeeded
+        self.error = None
+        self.future = None
+        self.cond = threading.Condition()
+
+    def write(self, text):
+        with self.cond:
+            self.chunks.append(text)
+            self.cond.notify_all()
+
+    def finish(self, ok):
+        with self.cond:
+            self.done = True
+            self.ok = ok
+            self.cond.notify_all()
+
+    def follow(self, timeout=_HEARTBEAT):
+        """yield the output as it is written, None after `timeout` idle s"""
+        i = 0
+        while True:
+            with self.cond:
+                if i == len(self.chunks) and not self.done:
+                    self.cond.wait(timeout)
+                new = self.chunks[i:]
+                done = self.done
+            i += len(new)
+            if new:
+                yield "".join(new)
+            elif done:
+                return
+            else:
+                yield None
+
+
+class _RoutedStream(object):
+    """stand-in for sys.stdout and sys.stderr writing to the current job"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text):
+        job = _current_job.get()
+        if job is None:
+            return self.fallback.write(text)
+        if isinstance(text, bytes):
+            # makes click fall back to text output
+            raise TypeError("text stream")
+        if text:
+            job.write(text)
+        return len(text)
+
+    def flush(self):
+        if _current_job.get() is None:
+            self.fallback.flush()
+
+    def isatty(self):
+        return _current_job.get() is None and self.fallback.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self.fallback, name)
+
+
+def route_output():
+    """send what jobs print to their own output, once per process"""
+    if not isinstance(sys.stdout, _RoutedStream):
+        sys.stdout = _RoutedStream(sys.stdout)
+    if not isinstance(sys.stderr, _RoutedStream):
+        sys.stderr = _RoutedStream(sys.stderr)
+
+
+class JobRunner(object):
+    """run submitted command lines of `func` on a bounded worker pool
+
+    Only the last `keep` jobs are remembered.
+    """
+
+    def __init__(self, func, workers=4, keep=200):
+        self.func = func
+        self.keep = keep
+        self.jobs = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="quick-job")
+
+    def submit(self, argv, job=None):
+        """queue `argv`, in `job` when given instead of a new `ServerJob`"""
+        if job is None:
+            job = ServerJob(argv)
+        with self.lock:
+            self.jobs[job.job_id] = job
+            while len(self.jobs) > self.keep:
+                self.jobs.popitem(last=False)
+        job.future = self.pool.submit(contextvars.copy_context().run, self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job):
+        _current_job.set(job)
+        ok = False
+        try:
+            rv = self.func(
+                args=job.argv[1:], prog_name=job.argv[0], standalone_mode=False
+            )
+            if inspect.iscoroutine(rv):
+                asyncio.run(rv)
+            ok = True
+        except click.exceptions.Abort:
+            job.error = "Aborted!"
+            job.write("Aborted!\n")
+        except click.exceptions.ClickException as e:
+            job.error = e.format_message()
+            job.write(f"Error: {e.format_message()}\n")
+        except Exception as e:
+            job.error = repr(e)
+            job.write(traceback.format_exc())
+        finally:
+            job.finish(ok)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+
+
+class QuickHTTPServer(HTTPServer):
+    """HTTP server handling connections on a bounded pool of threads"""
+
+    def __init__(self, address, func, workers=4, handlers=64):
+        super(QuickHTTPServer, self).__init__(address, QuickRequestHandler)
+        self.func = func
+        # sent with every form, a page of another site cannot read it
+        self.token = secrets.token_urlsafe(32)
+        self.runner = JobRunner(func, workers)
+        self.executor = ThreadPoolExecutor(handlers, thread_name_prefix="quick-http")
+        route_output()
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super(QuickHTTPServer, self).server_close()
+        self.runner.shutdown()
+        self.executor.shutdown(wait=False)
+
+
+class QuickRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # idle keep-alive connections must not hold a pool thread for long
+    timeout = 30
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        if not parts or parts[0] == "cmd":
+            return self.show_command(tuple(parts[1:]))
+        if parts[0] == "jobs" and len(parts) >= 2 and parts[1].isdigit():
+            job = self.server.runner.get(int(parts[1]))
+            if job is None:
+                return self.send_error(HTTPStatus.NOT_FOUND)
+            if len(parts) == 2:
+                return self.show_job(job)
+            if parts[2:] == ["events"]:
+                return self.stream_events(job)
+            if parts[2:] == ["output"]:
+                return self.stream_output(job)
+        self.send_error(HTTPStatus.NOT_FOUND)
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        if not parts or parts[0] != "cmd":
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        path = tuple(parts[1:])
+        cmds = resolve(self.server.func, path)
+        if cmds is None or isinstance(cmds[-1], click.MultiCommand):
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return self.send_error(HTTPStatus.BAD_REQUEST, "bad Content-Length")
+        form = parse_qs(self.rfile.read(length).decode(), keep_blank_values=True)
+        if not self.same_origin(form):
+            return self.send_error(HTTPStatus.FORBIDDEN, "cross-site request")
+        argv = [cmds[0].name]
+        try:
+            for level, cmd in enumerate(cmds):
+                if level:
+                    argv.append(path[level - 1])
+                argv += form_argv(cmd, level, form)
+        except ValueError as e:
+            return self.send_error(HTTPStatus.BAD_REQUEST, str(e))
+        job = self.server.runner.submit(argv)
+        self.send_response(HTTPStatus.SEE_OTHER)
+        self.send_header("Location", f"/jobs/{job.job_id}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def same_origin(self, form):
+        """whether a POST comes from a form served here
+
+        Browsers send cross-site form posts without asking first, so the
+        form has to carry the server's token and a sent ``Origin`` has to
+        name this server.
+        """
+        origin = self.headers.get("Origin")
+        if origin is not None and urlsplit(origin).netloc != self.headers.get("Host"):
+            return False
+        token = form.get("_token", [""])[0]
+        return hmac.compare_digest(token.encode(), self.server.token.encode())
+
+    def send_page(self, title, body, path=()):
+        links = ['<a href="/">' + html.escape(self.server.func.name) + "</a>"]
+        for i, name in enumerate(path):
+            href = "/cmd/" + "/".join(quote(p) for p in path[: i + 1])
+            links.append(f'<a href="{href}">{html.escape(name)}</a>')
+        page = _PAGE.format(
+            title=html.escape(title), nav=" / ".join(links), body=body
+        ).encode()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def show_command(self, path):
+        cmds = resolve(self.server.func, path)
+        if cmds is None:
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        cmd = cmds[-1]
+        body = ""
+        if cmd.help:
+            body += f'<p class="help">{html.escape(cmd.help)}</p>'
+        if isinstance(cmd, click.MultiCommand):
+            # subcommands are only resolved once their page is opened
+            names = cmd.list_commands(click.Context(cmd))
+            items = "".join(
+                f'<li><a href="/cmd/{"/".join(quote(p) for p in path + (n,))}">'
+                f"{html.escape(n)}</a></li>"
+                for n in names
+            )
+            body += f"<ul>{items}</ul>"
+        else:
+            fieldsets = "".join(
+                f"<fieldset><legend>{html.escape(c.name or '')}</legend>"
+                f"{command_form(c, level)}</fieldset>"
+                for level, c in enumerate(cmds)
+                if c.params
+            )
+            action = "/cmd/" + "/".join(quote(p) for p in path)
+            token = f'<input type="hidden" name="_token" value="{self.server.token}">'
+            body += (
+                f'<form method="post" action="{action}">{token}{fieldsets}'
+                '<button type="submit">Run</button></form>'
+            )
+        self.send_page(" ".join((self.server.func.name,) + path), body, path)
+
+    def show_job(self, job):
+        body = (
+            f"<p><code>{html.escape(' '.join(job.argv))}</code></p>"
+            + _FOLLOW.format(url=f"/jobs/{job.job_id}/events")
+        )
+        self.send_page(f"job {job.job_id}", body)
+
+    def start_chunked(self, content_type):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def send_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def stream_events(self, job):
+        """server-sent events, one per chunk of output, then ``done``"""
+        self.start_chunked("text/event-stream; charset=utf-8")
+        try:
+            for text in job.follow():
+                if text is None:
+                    self.send_chunk(": keep-alive\n\n")
+                else:
+                    self.send_chunk(f"data: {json.dumps(text)}\n\n")
+            status = "done" if job.ok else "failed"
+            self.send_chunk(f"event: done\ndata: {json.dumps(status)}\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def stream_output(self, job):
+        """the raw output, chunked as it is written"""
+        self.start_chunked("text/plain; charset=utf-8")
+        try:
+            for text in job.follow():
+                if text:
+                    self.send_chunk(text)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+def serve_it(click_func, host="127.0.0.1", port=8000, workers=4, handlers=64):
+    """
+    Parameters
+    ----------
+    click_func
+    serve a form per command of `click_func` over HTTP until interrupted;
+    `workers` jobs run at once, `handlers` connections are served at once
+    """
+    server = QuickHTTPServer((host, port), click_func, workers, handlers)
+    print(f"Serving {click_func.name} on http://{host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
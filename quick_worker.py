@@ -0,0 +1,425 @@
+import json
+import time
+import queue
+import socket
+import itertools
+import threading
+import collections
+import socketserver
+
+from quick_server import JobRunner, ServerJob, route_output
+
+# run the commands of `quick` on worker daemons, without loading Qt
+#
+# Both sides exchange JSON objects, one per line:
+#   client -> worker  {"op": "run", "id", "argv"}  {"op": "cancel", "id"}
+#                     {"op": "ping"}
+#   worker -> client  {"op": "hello", "program", "slots", "running"}
+#                     {"op": "output", "id", "text"}
+#                     {"op": "done", "id", "ok", "error", "running"}
+#                     {"op": "pong", "running"}
+# `running` counts the jobs of every client queued or running on the worker.
+
+_RECONNECT = 2.0
+_TIMEOUT = 5.0
+
+
+def parse_address(address):
+    """``(host, port)`` of ``"host:port"``"""
+    if isinstance(address, str):
+        host, _, port = address.rpartition(":")
+        return host or "127.0.0.1", int(port)
+    return tuple(address)
+
+
+def _encode(message):
+    return json.dumps(message).encode("utf-8") + b"\n"
+
+
+class _WorkerJob(ServerJob):
+    """a job of a remote client, its output sent over the connection"""
+
+    def __init__(self, argv, remote_id, handler):
+        super(_WorkerJob, self).__init__(argv)
+        self.remote_id = remote_id
+        self.handler = handler
+
+    def write(self, text):
+        # nothing follows the job here, the text is not kept
+        self.handler.send({"op": "output", "id": self.remote_id, "text": text})
+
+    def finish(self, ok):
+        super(_WorkerJob, self).finish(ok)
+        running = self.handler.server.job_done()
+        self.handler.send(
+            {
+                "op": "done",
+                "id": self.remote_id,
+                "ok": ok,
+                "error": self.error,
+                "running": running,
+            }
+        )
+
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    """one client connection, its jobs and the thread sending their output"""
+
+    def handle(self):
+        server = self.server
+        self.outbox = queue.Queue()
+        self.jobs = {}
+        sender = threading.Thread(target=self.send_loop, daemon=True)
+        sender.start()
+        self.send(
+            {
+                "op": "hello",
+                "program": server.func.name,
+                "slots": server.workers,
+                "running": server.running,
+            }
+        )
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "run":
+                    job = _WorkerJob(message["argv"], message["id"], self)
+                    self.jobs[job.remote_id] = job
+                    server.start(job)
+                elif op == "cancel":
+                    job = self.jobs.get(message["id"])
+                    # a started job runs to its end
+                    if job is not None and not job.done and job.future.cancel():
+                        job.error = "cancelled"
+                        job.finish(False)
+                elif op == "ping":
+                    self.send({"op": "pong", "running": server.running})
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.outbox.put(None)
+            sender.join()
+
+    def send(self, message):
+        self.outbox.put(message)
+
+    def send_loop(self):
+        """send the queued messages, the output of a job joined"""
+        closed = False
+        while not closed:
+            batch = [self.outbox.get()]
+            while True:
+                try:
+                    batch.append(self.outbox.get_nowait())
+                except queue.Empty:
+                    break
+            out = []
+            for message in batch:
+                if message is None:
+                    closed = True
+                    break
+                last = out[-1] if out else None
+                if (
+                    last is not None
+                    and message["op"] == last["op"] == "output"
+                    and message["id"] == last["id"]
+                ):
+                    last["text"] += message["text"]
+                else:
+                    out.append(message)
+            try:
+                self.connection.sendall(b"".join(_encode(m) for m in out))
+            except OSError:
+                # the client is gone, drop what its jobs still write
+                closed = True
+        self.finish_jobs()
+
+    def finish_jobs(self):
+        self.send = lambda message: None
+        for job in self.jobs.values():
+            if not job.done and job.future is not None and job.future.cancel():
+                job.finish(False)
+
+
+class WorkerServer(socketserver.ThreadingTCPServer):
+    """run the command lines sent by `WorkerPool` clients on `workers` threads
+
+    The protocol has no authentication, only listen on trusted networks.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, func, workers=4):
+        super(WorkerServer, self).__init__(address, WorkerHandler)
+        self.func = func
+        self.workers = workers
+        self.runner = JobRunner(func, workers)
+        self.running = 0
+        self.lock = threading.Lock()
+        self.connections = set()
+        route_output()
+
+    def start(self, job):
+        with self.lock:
+            self.running += 1
+        self.runner.submit(job.argv, job)
+
+    def job_done(self):
+        with self.lock:
+            self.running -= 1
+            return self.running
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections.add(request)
+        super(WorkerServer, self).process_request(request, client_address)
+
+    def shutdown_request(self, request):
+        with self.lock:
+            self.connections.discard(request)
+        super(WorkerServer, self).shutdown_request(request)
+
+    def server_close(self):
+        super(WorkerServer, self).server_close()
+        with self.lock:
+            connections = list(self.connections)
+        for request in connections:
+            # wakes up the handlers blocked reading their client
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.runner.shutdown()
+
+
+class RemoteRun(object):
+    """a command line queued on a `WorkerPool`
+
+    `write(text)` gets the output while it runs, `finish(ok, error)` is
+    called once at the end; both from a thread of the pool.
+    """
+
+    def __init__(self, run_id, argv, program, write, finish):
+        self.run_id = run_id
+        self.argv = list(argv)
+        self.program = program
+        self.write = write
+        self.finish = finish
+        self.worker = None
+        self.attempts = 0
+        self.cancelled = False
+
+
+class _Worker(object):
+    """connection to one worker daemon, reconnected when lost"""
+
+    def __init__(self, pool, address):
+        self.pool = pool
+        self.address = parse_address(address)
+        self.name = "%s:%d" % self.address
+        self.sock = None
+        self.alive = False
+        self.program = None
+        self.slots = 1
+        self.running = 0
+        self.runs = {}
+        self.thread = threading.Thread(
+            target=self.run, name=f"quick-worker-{self.name}", daemon=True
+        )
+
+    @property
+    def load(self):
+        return self.running / self.slots
+
+    def send(self, message):
+        self.sock.sendall(_encode(message))
+
+    def run(self):
+        pool = self.pool
+        while not pool.closed:
+            try:
+                sock = socket.create_connection(self.address, pool.timeout)
+                rfile = sock.makefile("rb")
+                hello = json.loads(rfile.readline())
+                sock.settimeout(None)
+            except (OSError, ValueError):
+                pool.wait_closed(pool.reconnect)
+                continue
+            pool.connected(self, sock, hello)
+            try:
+                for line in rfile:
+                    pool.received(self, json.loads(line))
+            except (OSError, ValueError):
+                pass
+            pool.lost(self)
+            pool.wait_closed(pool.reconnect)
+
+
+class WorkerPool(object):
+    """dispatch command lines to `WorkerServer` daemons
+
+    `addresses` are ``"host:port"`` strings or ``(host, port)`` tuples. A run
+    goes to the connected worker of its program with the lowest load, the
+    jobs queued or running per slot as last reported by the worker. While
+    every worker is full, runs wait here. The runs of a lost worker are
+    queued again, at most `retries` times each, and the worker is
+    reconnected every `reconnect` seconds.
+    """
+
+    def __init__(self, addresses, retries=2, reconnect=_RECONNECT, timeout=_TIMEOUT):
+        self.retries = retries
+        self.reconnect = reconnect
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.closed = False
+        self._closed = threading.Event()
+        self.queue = collections.deque()
+        self._run_ids = itertools.count(1)
+        self.workers = [_Worker(self, address) for address in addresses]
+        for worker in self.workers:
+            worker.thread.start()
+
+    def submit(self, argv, write, finish, program=None):
+        """queue `argv` for a worker of `program`, any worker when None"""
+        run = RemoteRun(next(self._run_ids), argv, program, write, finish)
+        with self.lock:
+            self.queue.append(run)
+            self._dispatch()
+        return run
+
+    def cancel(self, run):
+        """drop a waiting run, or ask its worker not to start it"""
+        with self.lock:
+            run.cancelled = True
+            if run.worker is None:
+                try:
+                    self.queue.remove(run)
+                except ValueError:
+                    # already finished
+                    return
+            else:
+                try:
+                    run.worker.send({"op": "cancel", "id": run.run_id})
+                except OSError:
+                    pass
+                return
+        run.finish(False, "cancelled")
+
+    def wait_connected(self, timeout=None):
+        """wait until every worker is connected, False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not all(w.alive for w in self.workers):
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            self._closed.wait(0.01)
+        return True
+
+    def wait_closed(self, timeout):
+        self._closed.wait(timeout)
+
+    def close(self):
+        self.closed = True
+        self._closed.set()
+        with self.lock:
+            waiting = list(self.queue)
+            self.queue.clear()
+            for worker in self.workers:
+                if worker.sock is not None:
+                    try:
+                        worker.sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+        for run in waiting:
+            run.finish(False, "worker pool closed")
+
+    def connected(self, worker, sock, hello):
+        with self.lock:
+            worker.sock = sock
+            worker.program = hello.get("program")
+            worker.slots = max(int(hello.get("slots", 1)), 1)
+            worker.running = int(hello.get("running", 0))
+            worker.alive = True
+            self._dispatch()
+
+    def received(self, worker, message):
+        op = message.get("op")
+        if op == "output":
+            run = worker.runs.get(message["id"])
+            if run is not None:
+                run.write(message["text"])
+            return
+        with self.lock:
+            worker.running = message.get("running", worker.running)
+            run = None
+            if op == "done":
+                run = worker.runs.pop(message["id"], None)
+            self._dispatch()
+        if run is not None:
+            run.finish(message["ok"], message.get("error"))
+
+    def lost(self, worker):
+        failed = []
+        retried = []
+        with self.lock:
+            worker.alive = False
+            worker.sock.close()
+            worker.sock = None
+            runs = sorted(worker.runs.values(), key=lambda run: run.run_id)
+            worker.runs = {}
+            for run in reversed(runs):
+                run.worker = None
+                if run.cancelled or self.closed or run.attempts > self.retries:
+                    failed.append(run)
+                else:
+                    self.queue.appendleft(run)
+                    retried.append(run)
+            self._dispatch()
+        for run in retried:
+            run.write(f"\n[lost worker {worker.name}, running again]\n")
+        for run in failed:
+            run.finish(False, f"lost worker {worker.name}")
+
+    def _dispatch(self):
+        # with the lock held
+        for run in list(self.queue):
+            ready = [
+                w
+                for w in self.workers
+                if w.alive
+                and w.running < w.slots
+                and (run.program is None or w.program == run.program)
+            ]
+            if not ready:
+                continue
+            worker = min(ready, key=lambda w: (w.load, -w.slots))
+            try:
+                worker.send({"op": "run", "id": run.run_id, "argv": run.argv})
+            except OSError:
+                # its reader thread finds out and requeues its runs
+                worker.alive = False
+                continue
+            self.queue.remove(run)
+            run.worker = worker
+            run.attempts += 1
+            worker.runs[run.run_id] = run
+            worker.running += 1
+
+
+def work_it(click_func, host="127.0.0.1", port=7100, workers=4):
+    """
+    Parameters
+    ----------
+    click_func
+    run the command lines `WorkerPool` clients send for `click_func` until
+    interrupted, `workers` of them at once
+    """
+    server = WorkerServer((host, port), click_func, workers)
+    print(f"Worker for {click_func.name} on {host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
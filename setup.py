@@ -7,7 +7,7 @@ setup(
     author="Shen Zhou",
     author_email="shenz34206@hotmail.com",
     license="GNU GPLv3",
-    py_modules=["quick"],
+    py_modules=["quick", "quick_server", "quick_worker"],
     install_requires=["click>=6.5", "qtpy"],
     extras_require={"qtstyle": ["qdarkstyle"]},
 )
@@ -1,8 +1,22 @@
 import quick
+import quick_server
+import quick_worker
 import click
 import unittest
 
+import os
 import sys
+import time
+import re
+import io
+import json
+import gzip
+import zlib
+import tempfile
+import threading
+import http.client
+import asyncio
+import logging
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 from PyQt5 import QtCore
@@ -15,15 +29,844 @@ def select_name(name):
     pass
 
 
+def _complete_dataset(ctx, param, incomplete):
+    return [n for n in ["alpha", "beta", "alps"] if n.startswith(incomplete)]
+
+
+@click.command()
+@click.option("--dataset", shell_complete=_complete_dataset)
+def pick_dataset(dataset):
+    pass
+
+
+sensors = click.Choice(["sensor-%05d" % i for i in range(5000)])
+
+
+@click.command()
+@click.option("--src", type=sensors)
+@click.option("--dst", type=sensors, multiple=True)
+def link_sensors(src, dst):
+    pass
+
+
+def _scan_default():
+    return "scanned"
+
+
+@click.command()
+@click.option("--root", default=_scan_default)
+@click.option("--names", default=lambda: ["a", "b"], multiple=True)
+def scan(root, names):
+    pass
+
+
+class LazyGroup(click.Group):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loaded = []
+
+    def list_commands(self, ctx):
+        return ["scan", "link"]
+
+    def get_command(self, ctx, name):
+        self.loaded.append(name)
+        return {"scan": scan, "link": link_sensors}[name]
+
+
+@click.command()
+@click.argument("n", type=int)
+def fail(n):
+    raise ValueError(n)
+
+
+@click.command()
+def crunch():
+    with click.progressbar(range(50), label="crunching") as bar:
+        for _ in bar:
+            pass
+
+
+@click.command()
+@click.argument("delay", type=float)
+async def nap(delay):
+    await asyncio.sleep(delay)
+    print("woke up")
+
+
+@click.group(chain=True)
+def stream():
+    pass
+
+
+@stream.command()
+@click.argument("n", type=int)
+def count(n):
+    return lambda items: iter(range(n))
+
+
+@stream.command()
+def double():
+    return lambda items: (i * 2 for i in items)
+
+
+@stream.command()
+@click.argument("after", type=int)
+def reject(after):
+    def processor(items):
+        for i, item in enumerate(items):
+            if i == after:
+                raise ValueError("bad item")
+            yield item
+
+    return processor
+
+
+@stream.command()
+def eager():
+    def processor(items):
+        raise ValueError("bad input")
+
+    return processor
+
+
+@stream.result_callback()
+def collect(processors):
+    items = ()
+    for processor in processors:
+        items = processor(items)
+    stream.collected = list(items)
+
+
+@click.command()
+@click.argument("src", type=click.Path())
+def word_count(src):
+    with open(src) as f:
+        word_count.counts.append(len(f.read().split()))
+
+
+word_count.counts = []
+
+
+@click.command()
+@click.argument("seconds", type=float)
+def burn(seconds):
+    block = bytearray(8 << 20)
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        sum(range(1000))
+    return len(block)
+
+
+@click.command()
+@click.argument("n", type=int)
+def table(n):
+    def rows():
+        for i in range(n):
+            table.readers.add(threading.current_thread().name)
+            yield {"n": i, "parity": "odd" if i % 2 else "even"}
+
+    table.readers = set()
+    return rows()
+
+
+@click.command()
+@click.argument("pair", nargs=2, default=("x", "y"))
+@click.option("--level", type=click.IntRange(0, 10), default=3)
+@click.option("--mode", type=click.Choice(["fast", "safe"]))
+@click.option("--tag", multiple=True, default=["a", "b"])
+@click.option("--size", type=(int, int))
+@click.option("--dry/--no-dry", default=True)
+@click.option("-v", "--verbose", count=True)
+@click.option("--out")
+def configure(**kwargs):
+    pass
+
+
 class TestFunction(unittest.TestCase):
     def setUp(self):
-        self._app = QtWidgets.QApplication(sys.argv)
+        # keep one application alive for all tests, shared models are
+        # deleted along with it
+        if QtWidgets.QApplication.instance() is None:
+            TestFunction._app = QtWidgets.QApplication(sys.argv)
 
     def test_opt_to_widget(self):
         self.assertIsInstance(
             quick.opt_to_widget(select_name.params[0])[0][1], QtWidgets.QComboBox
         )
 
+    def test_path_completer_shares_model(self):
+        a = quick.GLineEdit_path()
+        b = quick.GLineEdit_path.from_option(click.Path(exists=True))
+        self.assertIs(a.completer().model(), b.completer().model())
+        self.assertIs(a.fdlg(), quick.GFileDialog.shared())
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = os.path.realpath(tmp)
+            os.mkdir(os.path.join(tmp, "data"))
+            os.chdir(tmp)
+            try:
+                completer = a.completer()
+                full = completer.splitPath(os.path.join(tmp, "data", "x"))
+                self.assertEqual(completer.splitPath("data/x"), full)
+                index = completer.model().index(os.path.join(tmp, "data"))
+                self.assertEqual(completer.pathFromIndex(index), "data")
+                completer.splitPath("/")
+                self.assertEqual(
+                    completer.pathFromIndex(index), os.path.join(tmp, "data")
+                )
+            finally:
+                os.chdir(cwd)
+
+    def test_async_completion(self):
+        opt = pick_dataset.params[0]
+        edit = quick.opt_to_widget(opt)[0][1]
+        completer = edit.completer()
+        self.assertIsInstance(completer, quick.GParamCompleter)
+        edit.setText("al")
+        completer.request()
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        QtWidgets.QApplication.processEvents()
+        self.assertEqual(completer.model().stringList(), ["alpha", "alps"])
+        self.assertEqual(quick.cached_completions(opt, "al"), ["alpha", "alps"])
+
+    def test_choice_model_shared_and_filtered(self):
+        src = quick.opt_to_widget(link_sensors.params[0])[0][1]
+        dst = quick.opt_to_widget(link_sensors.params[1])[0][1]
+        row = dst.itemAtPosition(0, 0).widget()
+        self.assertIs(src.model(), row.model())
+        self.assertEqual(src.model().rowCount(), quick._LazyListModel.batch)
+        filter_model = src.completer().model()
+        filter_model.set_filter("sensor-0499")
+        self.assertEqual(filter_model.items[:2], ["sensor-04990", "sensor-04991"])
+        filter_model.set_filter("sensor-04999")
+        self.assertEqual(filter_model.items, ["sensor-04999"])
+        self.assertEqual(src.currentText(), "sensor-00000")
+        # a hit beyond the rows the combo has loaded
+        completer = src.completer()
+        completer.complete()
+        popup = completer.popup()
+        popup.clicked.emit(popup.model().index(0, 0))
+        self.assertEqual(src.currentText(), "sensor-04999")
+        self.assertEqual(src.currentIndex(), 4999)
+
+    def test_lazy_callable_default(self):
+        layout = quick.CommandLayout(scan, run_exit=False)
+        self.assertEqual(layout.lazy_defaults, [0, 1])
+        self.assertFalse(layout.widgets[0][1].isEnabled())
+        quick.default_pool().waitForDone()
+        QtWidgets.QApplication.processEvents()
+        self.assertEqual(layout.widgets[0][1].text(), "scanned")
+        self.assertEqual(
+            quick.generate_sysargv([("scan", layout.params_func)]),
+            ["scan", "--root", "scanned", "--names", "a", "--names", "b"],
+        )
+        self.assertEqual(quick._default_cache[_scan_default], "scanned")
+
+    def test_command_index_search(self):
+        cli = click.Group("cli", commands=[scan, link_sensors])
+        index = quick.CommandIndex(cli)
+        path, name = index.search("--root")[0][:2]
+        self.assertEqual((path, name), (("scan",), "root"))
+        # fuzzy match on the option key
+        self.assertEqual(index.search("lnksrc")[0][:2], (("link-sensors",), "src"))
+        self.assertEqual(index.search("no such thing"), [])
+
+    def test_lazy_group(self):
+        group = LazyGroup("plugins")
+        app = quick.App(group, run_exit=False, new_thread=False, output="term")
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        QtWidgets.QApplication.processEvents()
+        self.assertEqual(group.loaded, ["scan"])
+        app.goto(("link",), "dst")
+        self.assertEqual(group.loaded, ["scan", "link"])
+        self.assertIn(("link",), app.layouts)
+        app.close()
+
+    def test_update_func_keeps_unchanged_rows(self):
+        old = click.Command("cmd", params=[click.Option(["--a"]), click.Option(["--b"])])
+        new = click.Command(
+            "cmd", params=[click.Option(["--a"]), click.Option(["--b"], type=int)]
+        )
+        layout = quick.CommandLayout(old, run_exit=False)
+        edit = layout.widgets[0][1]
+        edit.setText("kept")
+        self.assertEqual(layout.update_func(new), 1)
+        self.assertIs(layout.widgets[0][1], edit)
+        self.assertIs(layout.func, new)
+        self.assertIsInstance(layout.params[1].type, click.types.IntParamType)
+
+    def test_reload_adds_and_removes_subcommands(self):
+        def group(*names):
+            return click.Group(
+                "cli", commands=[click.Command(n, params=[]) for n in names]
+            )
+
+        app = quick.App(group("a", "b", "c"), False, False, output="term")
+        tabs = app.opt_set.tabs
+        app.reload_func(group("b", "c"))
+        app.reload_func(group("a", "c"))
+        app.reload_func(group("a", "b", "c"))
+        self.assertEqual([tabs.tabText(i) for i in range(tabs.count())], list("abc"))
+        for name in "abc":
+            widget, i = app.tabs[(name,)]
+            self.assertEqual(tabs.tabText(i), name)
+            self.assertEqual(tabs.widget(i).resolve().name, name)
+        app.close()
+        with self.assertRaises(ValueError):
+            quick.SourceWatcher(click.Command("local", callback=lambda: None))
+        with self.assertRaises(ValueError):
+            quick.SourceWatcher(click.Group("bare"))
+
+    def test_errors_are_reported_through_signals(self):
+        signals = quick.JobSignals()
+        errors = []
+        signals.failed.connect(errors.append)
+        pool = QtCore.QThreadPool()
+        pool.start(quick.RunCommand(fail, False, signals, argv=["fail", "3"]))
+        pool.start(quick.RunCommand(fail, False, signals, argv=["fail", "x"]))
+        pool.waitForDone()
+        QtWidgets.QApplication.processEvents()
+        messages = {e.argv[1]: e.message for e in errors}
+        self.assertEqual(messages["3"], "ValueError(3)")
+        self.assertIn("'x' is not a valid integer", messages["x"])
+        panel = quick.ErrorPanel()
+        for e in errors:
+            panel.add_error(e)
+        self.assertEqual(panel.errors.topLevelItemCount(), 2)
+        panel.close()
+
+    def test_progressbar_is_routed_to_job(self):
+        quick.install_progress_hooks()
+        signals = quick.JobSignals()
+        states = []
+        signals.progress.connect(lambda job_id, state: states.append(state))
+        stream = quick.GuiStream()
+        written = []
+        stream.textWritten.connect(written.append)
+        stdout, sys.stdout = sys.stdout, stream
+        try:
+            quick.RunCommand(crunch, False, signals, argv=["crunch"]).run()
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(states[-1][:3], (50, 50, "crunching"))
+        self.assertEqual(written, [])
+
+    def test_log_panel_batches_and_filters(self):
+        panel = quick.LogPanel(max_rows=3)
+        log = logging.getLogger("quick.test")
+        log.addHandler(panel.handler)
+        log.setLevel(logging.DEBUG)
+        try:
+            for i in range(5):
+                log.debug("step %d", i)
+            log.warning("done")
+        finally:
+            log.removeHandler(panel.handler)
+        self.assertEqual(panel.model.rowCount(), 0)
+        panel.flush()
+        self.assertEqual([r[-1] for r in panel.model.rows], ["step 3", "step 4", "done"])
+        panel.proxy.set_min_level(logging.WARNING)
+        self.assertEqual(panel.proxy.rowCount(), 1)
+        panel.close()
+
+    def test_log_panel_lowers_root_level(self):
+        root = logging.getLogger()
+        level = root.level
+        stdout, stderr = sys.stdout, sys.stderr
+        try:
+            root.setLevel(logging.WARNING)
+            host = quick.JobHost(output="gui", log_level=logging.INFO)
+            logging.getLogger("quick.test").debug("hidden")
+            logging.getLogger("quick.test").info("shown")
+            host.logPanel.flush()
+            self.assertEqual([r[-1] for r in host.logPanel.model.rows], ["shown"])
+            host.close()
+            self.assertEqual(root.level, logging.WARNING)
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+            root.setLevel(level)
+
+    def test_coroutine_commands_share_one_loop(self):
+        self.assertTrue(quick.is_async_command(nap))
+        signals = quick.JobSignals()
+        errors, done = [], {}
+        signals.failed.connect(errors.append)
+        signals.finished.connect(lambda job_id, ok: done.__setitem__(job_id, ok))
+        fast = quick.RunCommand(nap, True, signals, ["nap", "0"], is_async=True)
+        slow = quick.RunCommand(nap, True, signals, ["nap", "60"], is_async=True)
+        fast.run()
+        slow.run()
+        slow.cancel()
+        deadline = time.monotonic() + 5
+        while len(done) < 2 and time.monotonic() < deadline:
+            QtWidgets.QApplication.processEvents()
+            time.sleep(0.01)
+        self.assertEqual(done, {fast.job_id: True, slow.job_id: False})
+        self.assertEqual([e.message for e in errors], ["cancelled"])
+
+    def test_chain_runs_as_pipeline(self):
+        quick.install_pipeline_hook(stream)
+        signals = quick.JobSignals()
+        stats = []
+        signals.stages.connect(lambda job_id, s: stats.append(s))
+        runcmd = quick.RunCommand(
+            stream, False, signals, ["stream", "count", "5", "double"]
+        )
+        runcmd.pipeline = ["count", "double"]
+        runcmd.run()
+        self.assertEqual(stream.collected, [0, 2, 4, 6, 8])
+        QtWidgets.QApplication.processEvents()
+        self.assertEqual([n for _, n, _ in stats[-1]], [5, 5])
+
+    def test_pipeline_stops_upstream_stages(self):
+        quick.install_pipeline_hook(stream)
+        signals = quick.JobSignals()
+        errors = []
+        signals.failed.connect(errors.append)
+        # the count stage fills its queue long before the failure
+        failing = quick.RunCommand(
+            stream, False, signals, ["stream", "count", "1000", "reject", "1"]
+        )
+        failing.pipeline = ["count", "reject"]
+        failing.run()
+        # raises when called, before reading any item
+        eager = quick.RunCommand(
+            stream, False, signals, ["stream", "count", "1000", "eager"]
+        )
+        eager.pipeline = ["count", "eager"]
+        eager.run()
+        cancelled = quick.RunCommand(
+            stream, False, signals, ["stream", "count", "1000000000", "double"]
+        )
+        cancelled.pipeline = ["count", "double"]
+        threading.Timer(0.2, cancelled.cancel).start()
+        cancelled.run()
+        QtWidgets.QApplication.processEvents()
+        self.assertEqual(len(errors), 3)
+        self.assertIn("bad item", errors[0].message)
+        self.assertIn("bad input", errors[1].message)
+        deadline = time.monotonic() + 5
+        while any(t.name.startswith("quick-stage-") for t in threading.enumerate()):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_auto_run_on_change(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "words.txt")
+            with open(src, "w") as f:
+                f.write("a b")
+            opt_set = quick.CommandLayout(word_count, False)
+            opt_set.widgets[0][1].setText(src)
+            jobs = []
+
+            def run():
+                jobs.append(quick.RunCommand(word_count, False, argv=["wc", src]))
+                jobs[-1].run()
+                return jobs[-1]
+
+            runner = quick.AutoRunner(opt_set, run, lambda job_id: None)
+            runner.delay = 50
+            runner._timer.setInterval(50)
+            runner.set_enabled(True)
+            self.assertIn(src, runner._watcher.files())
+            for text in ("a b c", "a b c d"):
+                with open(src, "w") as f:
+                    f.write(text)
+            deadline = time.monotonic() + 5
+            while not jobs and time.monotonic() < deadline:
+                QtWidgets.QApplication.processEvents()
+                time.sleep(0.01)
+            self.assertEqual(word_count.counts, [4])
+            other = os.path.join(tmp, "other.txt")
+            open(other, "w").close()
+            runner._edited.setInterval(10)
+            edit = opt_set.widgets[0][1]
+            for text, watched in ((other, [other]), ("", [])):
+                edit.setText(text)
+                deadline = time.monotonic() + 5
+                while runner._watcher.files() != watched:
+                    self.assertLess(time.monotonic(), deadline)
+                    QtWidgets.QApplication.processEvents()
+                    time.sleep(0.01)
+            self.assertNotIn(os.getcwd(), runner._watcher.directories())
+            runner.set_enabled(False)
+            self.assertEqual(runner._watcher.files(), [])
+
+    def test_dashboard_shares_one_host(self):
+        dash = quick.Dashboard(output="term")
+        dash.add_program(select_name)
+        dash.add_program(scan, name="scanner")
+        self.assertEqual(list(dash.apps), [0])
+        dash.sidebar.setCurrentRow(1)
+        first, second = dash.apps[0], dash.apps[1]
+        self.assertIs(dash.stack.currentWidget(), second)
+        self.assertIs(first.threadpool, second.threadpool)
+        self.assertIs(first.jobPanel, dash.host.jobPanel)
+        self.assertFalse(second.run_exit)
+        dash.sidebar.setCurrentRow(0)
+        self.assertIs(dash.apps[0], first)
+        dash.host.close()
+
+    def test_headless_form_matches_widgets(self):
+        opt_set = quick.CommandLayout(configure, False)
+        sys.argv = []
+        opt_set.add_sysargv()
+        form = quick.CommandForm(configure)
+        self.assertEqual(form.argv(), sys.argv)
+        self.assertNotIn("Sentinel.UNSET", sys.argv)
+        form.set(mode="safe", tag=["c"], size=[1, 2], dry=False, verbose=2)
+        self.assertEqual(
+            form.argv(level=7, out="o"),
+            ["configure", "x", "y", "--level", "7", "--mode", "safe"]
+            + ["--tag", "c", "--size", "1", "2", "--no-dry", "-v", "-v"]
+            + ["--out", "o"],
+        )
+        self.assertIsNone(form.validate())
+        self.assertIn("'2.5' is not a valid", form.validate(size=[1, "2.5"]))
+        argv = form.argv(level=11)
+        self.assertEqual(argv[argv.index("--level") + 1], "11")
+        self.assertIn("11 is not in the range", form.validate(level=11))
+        with self.assertRaises(KeyError):
+            form["nope"] = 1
+        results = list(form.validate_many({"mode": m} for m in ["fast", "slow"]))
+        self.assertEqual([e is None for _, e in results], [True, False])
+        sub = quick.CommandForm(hello).set(loud=True).command("greet")
+        self.assertEqual(
+            sub.argv(times=2), ["hello", "--loud", "greet", "--name", "world", "2"]
+        )
+        self.assertIsNone(sub.validate(times=2))
+        self.assertIsNotNone(sub.validate(times="x"))
+
+    def test_palette_theme_has_no_stylesheet(self):
+        style = quick.GStyle("dark")
+        self.assertEqual(style.stylesheet, "")
+        self.assertEqual(style.palette["Window"], "#19232d")
+        font = QtGui.QFont()
+        font.setPixelSize(16)
+        theme = quick._ThemeStyle({"_OptionLabel": font})
+        label = quick._OptionLabel("x")
+        theme.polish(label)
+        self.assertEqual(label.font().pixelSize(), 16)
+
+    def test_job_output_is_teed_to_rotating_logs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            tee = quick.OutputTee(tmp, compress="zlib", max_bytes=300, buffer_size=100)
+            tee.open_job(1, ["cmd", "--x"])
+            for i in range(100):
+                tee.write(1, f"line {i}\n")
+            tee.close_job(1)
+            tee.flush()
+            text = b""
+            for path in tee.paths[1]:
+                with open(path, "rb") as f:
+                    text += zlib.decompress(f.read())
+            self.assertGreater(len(tee.paths[1]), 1)
+            self.assertTrue(text.startswith(b"$ cmd --x\nline 0\n"))
+            self.assertTrue(text.endswith(b"line 99\n"))
+
+            tee = quick.OutputTee(tmp, layout="{command}-{job_id}{part}.log")
+            stdout, sys.stdout = sys.stdout, quick._TeeStream(io.StringIO())
+            try:
+                runcmd = quick.RunCommand(hello, False, argv=["hello", "greet", "2"])
+                runcmd.tee = tee
+                runcmd.run()
+                printed = sys.stdout.stream.getvalue()
+            finally:
+                sys.stdout = stdout
+            tee.close()
+            self.assertEqual(printed, "hello world\nhello world\n")
+            with gzip.open(tee.paths[runcmd.job_id][0], "rt") as f:
+                self.assertEqual(f.read(), "$ hello greet 2\n" + printed)
+
+    def test_jobs_are_sampled(self):
+        signals = quick.JobSignals()
+        samples = []
+        signals.resources.connect(lambda job_id, usage: samples.append(job_id))
+        runcmd = quick.RunCommand(burn, False, signals, ["burn", "0.4"])
+        jobs = {runcmd.job_id: runcmd}
+        monitor = quick.ResourceMonitor(jobs, signals, 0.05)
+        pool = QtCore.QThreadPool()
+        pool.start(runcmd)
+        deadline = time.monotonic() + 5
+        while not runcmd.done and time.monotonic() < deadline:
+            QtWidgets.QApplication.processEvents()
+            time.sleep(0.01)
+        pool.waitForDone()
+        QtWidgets.QApplication.processEvents()
+        monitor.set_interval(0)
+        summary = runcmd.usage.summary()
+        self.assertGreater(len(samples), 2)
+        self.assertGreater(summary["cpu_seconds"], 0.1)
+        self.assertGreaterEqual(summary["wall"], 0.4)
+        self.assertGreater(summary["peak_rss"], 8 << 20)
+        self.assertTrue(runcmd.usage.cpu)
+
+    def test_returned_rows_are_viewed_lazily(self):
+        signals = quick.JobSignals()
+        panel = quick.ResultPanel()
+        signals.result.connect(panel.add_result)
+        runcmd = quick.RunCommand(table, False, signals, ["table", "2500"])
+        runcmd.run()
+        QtWidgets.QApplication.processEvents()
+        model = panel.tabs.currentWidget().model
+
+        def wait_rows(n):
+            deadline = time.monotonic() + 5
+            while model.rowCount() < n:
+                self.assertLess(time.monotonic(), deadline)
+                QtWidgets.QApplication.processEvents()
+                time.sleep(0.01)
+
+        self.assertEqual(panel.tabs.tabText(0), f"job {runcmd.job_id}")
+        wait_rows(100)
+        self.assertEqual((model.rowCount(), model.columnCount()), (100, 2))
+        self.assertFalse(model.table.exhausted)
+        model.fetchMore(QtCore.QModelIndex())
+        wait_rows(1100)
+        self.assertEqual(model.rowCount(), 1100)
+        self.assertEqual(len(model.table), 1100)
+        model.sort(0, QtCore.Qt.SortOrder.DescendingOrder)
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        QtWidgets.QApplication.processEvents()
+        self.assertTrue(model.table.exhausted)
+        self.assertEqual(model.data(model.index(0, 0)), "2499")
+        self.assertEqual(model.data(model.index(0, 1)), "odd")
+        self.assertEqual(model.headerData(0, QtCore.Qt.Orientation.Vertical), "2499")
+        path = os.path.join(tempfile.mkdtemp(), "rows.json")
+        model.export(path)
+        QtCore.QThreadPool.globalInstance().waitForDone()
+        with open(path) as f:
+            rows = json.load(f)
+        self.assertEqual(len(rows), 2500)
+        self.assertEqual(rows[0], {"n": 2499, "parity": "odd"})
+        self.assertEqual(table.readers, {"quick-result"})
+
+    def test_output_search_is_incremental(self):
+        panel = quick.OutputPanel()
+        panel.buffer.chunk_lines = 100
+        panel.buffer.max_memory = 1000
+        for i in range(1000):
+            panel.print(f"line {i}{' ERROR' if i % 100 == 7 else ''}\n")
+        panel.print("ERROR still writing")
+        self.assertIsNotNone(panel.buffer.chunks[0].data)
+        hits, done = [], []
+        panel.searcher.found.connect(lambda serial, h: hits.extend(h))
+        panel.searcher.done.connect(lambda serial, n: done.append(n))
+
+        def search(query, **kargs):
+            del hits[:], done[:]
+            panel.searcher.search(query, **kargs)
+            panel.searcher.pool.waitForDone()
+            QtWidgets.QApplication.processEvents()
+            return hits
+
+        found = search("error")
+        self.assertEqual([n for n, _ in found][:3], [7, 107, 207])
+        self.assertEqual(found[-1], (1000, "ERROR still writing"))
+        self.assertEqual(done, [11])
+        self.assertEqual(search(r"^line 99\d$", regex=True)[0], (990, "line 990"))
+        self.assertEqual(search("error", case=True), [])
+        panel.print("\nline 1001 ERROR\n")
+        self.assertEqual(panel.searcher.results[("error", False, False)][0], 1000)
+        self.assertEqual(search("error")[-1], (1001, "line 1001 ERROR"))
+        self.assertEqual(panel.searcher.results[("error", False, False)][0], 1002)
+        panel.edit.goto_line(107)
+        self.assertEqual(panel.edit.textCursor().selectedText(), "line 107 ERROR")
+        with self.assertRaises(re.error):
+            panel.searcher.search("(", regex=True)
+
+    def test_output_lines_match_blocks(self):
+        panel = quick.OutputPanel()
+        panel.print("progress 10%\rprogress 100%\n")
+        panel.print("dos\r")
+        panel.print("\nend\n")
+        panel.edit.flush()
+        self.assertEqual(panel.buffer.lines, 4)
+        self.assertEqual(panel.edit.document().blockCount(), 5)
+        lines = list(panel.buffer.texts())[0][2].split("\n")
+        self.assertEqual(lines, ["progress 10%", "progress 100%", "dos", "end"])
+        panel.edit.goto_line(3)
+        self.assertEqual(panel.edit.textCursor().selectedText(), "end")
+
+    def test_ansi_output_is_rendered(self):
+        panel = quick.OutputPanel()
+        text = click.style("fail", fg="red", bold=True) + " ok\n"
+        # an escape cut between two writes
+        panel.print(text[:3])
+        panel.print(text[3:])
+        panel.print("\x1b]0;title\x07" + click.style("warn", fg=208) + "\n")
+        panel.edit.flush()
+        self.assertEqual(panel.edit.toPlainText(), "fail ok\nwarn\n")
+        self.assertEqual(panel.buffer.lines, 2)
+        cursor = QtGui.QTextCursor(panel.edit.document())
+        cursor.setPosition(2)
+        fmt = cursor.charFormat()
+        self.assertEqual(fmt.foreground().color().getRgb()[:3], (205, 0, 0))
+        self.assertEqual(fmt.fontWeight(), QtGui.QFont.Weight.Bold)
+        cursor.setPosition(6)
+        self.assertFalse(cursor.charFormat().foreground().style())
+        state = (1, None, True, False, False, False)
+        self.assertIs(quick.ansi_format(state), quick.ansi_format(state))
+        parser = quick.AnsiParser()
+        self.assertEqual(parser.feed("a\x1b[38;2;1;2"), [("a", None)])
+        self.assertEqual(parser.feed(";3mb"), [("b", ((1, 2, 3), None) + (False,) * 4)])
+
+
+@click.group()
+@click.option("--loud", is_flag=True)
+@click.pass_context
+def hello(ctx, loud):
+    ctx.obj = loud
+
+
+@hello.command()
+@click.option("--name", default="world")
+@click.option("-v", "--verbose", count=True)
+@click.argument("times", type=int)
+@click.pass_obj
+def greet(loud, name, verbose, times):
+    for _ in range(times):
+        click.echo(f"hello {name.upper() if loud else name}")
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.server = quick_server.QuickHTTPServer(("127.0.0.1", 0), hello)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_port)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_form_and_streamed_output(self):
+        self.conn.request("GET", "/cmd/greet")
+        page = self.conn.getresponse().read().decode()
+        self.assertIn('name="1.name" size="40" value="world"', page)
+        self.assertIn('name="0.loud"', page)
+        form = {"Content-Type": "application/x-www-form-urlencoded"}
+        token = f"_token={self.server.token}"
+        self.conn.request("POST", "/cmd/greet", "1.times=1", form)
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 403)
+        self.conn.request(
+            "POST",
+            "/cmd/greet",
+            token + "&1.times=1",
+            dict(form, Origin="http://evil.example"),
+        )
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 403)
+        self.conn.request("POST", "/cmd/greet", token + "&1.verbose=x&1.times=1", form)
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 400)
+        self.conn.putrequest("POST", "/cmd/greet")
+        self.conn.putheader("Content-Length", "many")
+        self.conn.endheaders()
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 400)
+        self.assertIn(f'name="_token" value="{self.server.token}"', page)
+        self.conn.request(
+            "POST", "/cmd/greet", token + "&0.loud=on&1.name=bo&1.times=2", form
+        )
+        response = self.conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 303)
+        job_url = response.getheader("Location")
+        job = self.server.runner.get(int(job_url.split("/")[-1]))
+        self.assertEqual(job.argv, ["hello", "--loud", "greet", "--name", "bo", "2"])
+        self.conn.request("GET", job_url + "/events")
+        events = self.conn.getresponse().read().decode()
+        self.assertIn('data: "hello BO\\n', events)
+        self.assertTrue(events.endswith('event: done\ndata: "done"\n\n'))
+
+
+@click.command()
+@click.argument("n", type=int)
+@click.option("--wait", type=float, default=0.0)
+def square(n, wait):
+    time.sleep(wait)
+    print(n * n)
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+        for _ in range(2):
+            server = quick_worker.WorkerServer(("127.0.0.1", 0), square, workers=2)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers.append(server)
+        self.pool = quick_worker.WorkerPool(
+            [s.server_address for s in self.servers], reconnect=0.05
+        )
+        self.assertTrue(self.pool.wait_connected(5))
+        self.output = {}
+        self.results = {}
+        self.finished = threading.Semaphore(0)
+
+    def tearDown(self):
+        self.pool.close()
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def submit(self, *argv, program="square"):
+        def write(text):
+            self.output[run.run_id] = self.output.get(run.run_id, "") + text
+
+        def finish(ok, error):
+            self.results[run.run_id] = (ok, error)
+            self.finished.release()
+
+        run = self.pool.submit(["square", *argv], write, finish, program)
+        return run
+
+    def wait(self, n):
+        for _ in range(n):
+            self.assertTrue(self.finished.acquire(timeout=5))
+
+    def test_runs_are_spread_and_retried(self):
+        runs = [self.submit(str(i), "--wait", "0.2") for i in range(6)]
+        # four slots, the other two runs wait for the first to finish
+        self.assertEqual(len(self.pool.queue), 2)
+        self.wait(6)
+        self.assertEqual(
+            [self.output[r.run_id] for r in runs[:3]], ["0\n", "1\n", "4\n"]
+        )
+        self.assertEqual(
+            {r.worker.name for r in runs}, {w.name for w in self.pool.workers}
+        )
+        bad = self.submit("x")
+        self.wait(1)
+        self.assertFalse(self.results[bad.run_id][0])
+        self.assertIn("'x' is not a valid integer", self.results[bad.run_id][1])
+        run = self.submit("7", "--wait", "1")
+        time.sleep(0.2)
+        lost = self.servers[self.pool.workers.index(run.worker)]
+        lost.shutdown()
+        lost.server_close()
+        self.wait(1)
+        self.assertEqual(self.results[run.run_id], (True, None))
+        self.assertEqual(run.attempts, 2)
+        self.assertTrue(self.output[run.run_id].endswith("running again]\n49\n"))
+        other = self.submit("1", program="other")
+        self.pool.cancel(other)
+        self.wait(1)
+        self.assertEqual(self.results[other.run_id], (False, "cancelled"))
+        runcmd = quick.RunCommand(square, False, argv=["square", "5"])
+        runcmd.remote = self.pool
+        runcmd.run()
+        deadline = time.monotonic() + 5
+        while not runcmd.done and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNotNone(runcmd.remote_run.worker)
+        self.assertTrue(runcmd.done)
+
 
 if __name__ == "__main__":
     unittest.main()